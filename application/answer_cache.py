@@ -0,0 +1,192 @@
+"""
+오케스트레이터 최종 답변의 의미 기반 캐시
+- 질문을 로컬 문장 임베딩으로 변환하고 cosine 유사도가 임계값 이상이면 저장된 답변 재사용
+- 단, 질문의 대상 식별자(HER2, EGFR, T790M, NCT 번호처럼 숫자나 대문자 약어를 포함한 token)가
+  정확히 같은 항목만 후보로 사용 (HER2 질문에 HER3 답변을 돌려주지 않도록)
+- 답변과 함께 출처 스냅샷(모델, 참고 자료)을 저장하고 TTL 및 stale 여부를 추적
+- sentence-transformers가 없으면 문자 n-gram 해시 임베딩으로 대체
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from typing import List, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("answer_cache")
+
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "cache/answers.sqlite3")
+ANSWER_CACHE_TTL = 7 * 24 * 3600     # 7일이 지나면 사용하지 않음
+ANSWER_STALE_AFTER = 24 * 3600       # 1일이 지나면 stale로 표시
+EMBEDDING_MODEL = os.getenv("ANSWER_CACHE_EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+SIMILARITY_THRESHOLD = 0.92          # sentence-transformers 임베딩 기준
+FALLBACK_SIMILARITY_THRESHOLD = 0.95 # n-gram 해시 임베딩 기준 (덜 정교하므로 더 엄격하게)
+FALLBACK_DIMENSIONS = 512
+# 한 번의 조회에서 유사도를 계산할 최대 후보 수 (같은 모델/식별자의 유효 항목 중 최신순)
+MAX_CANDIDATES = 500
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-/.]*[A-Za-z0-9]|[A-Za-z0-9]")
+
+_encoder = None
+_encoder_lock = threading.Lock()
+_encoder_checked = False
+
+def _get_encoder():
+    """sentence-transformers 모델을 처음 사용할 때 로드 (없으면 None)"""
+    global _encoder, _encoder_checked
+    with _encoder_lock:
+        if not _encoder_checked:
+            _encoder_checked = True
+            try:
+                from sentence_transformers import SentenceTransformer
+                _encoder = SentenceTransformer(EMBEDDING_MODEL)
+                logger.info(f"Answer cache embedding model loaded: {EMBEDDING_MODEL}")
+            except Exception as e:
+                logger.warning(f"sentence-transformers unavailable, using n-gram embeddings: {e}")
+        return _encoder
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [v / norm for v in vector] if norm else vector
+
+def _ngram_embedding(text: str) -> List[float]:
+    """문자 3-gram을 해시하여 만든 고정 길이 벡터 (띄어쓰기 차이는 무시)"""
+    text = "".join(text.lower().split())
+    vector = [0.0] * FALLBACK_DIMENSIONS
+    for i in range(max(len(text) - 2, 1)):
+        digest = hashlib.md5(text[i:i + 3].encode("utf-8")).digest()  # nosec B324 - not for security
+        vector[int.from_bytes(digest[:4], "little") % FALLBACK_DIMENSIONS] += 1.0
+    return _normalize(vector)
+
+def embed(text: str):
+    """질문 임베딩 (backend 이름, 정규화된 벡터)"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return EMBEDDING_MODEL, _normalize([float(v) for v in encoder.encode(text)])
+    return "ngram", _ngram_embedding(text)
+
+def entity_key(text: str) -> str:
+    """질문의 대상 식별자 token을 정규화하여 정렬한 문자열
+
+    숫자를 포함하거나 대문자가 두 개 이상인 token(HER2, PD-L1, mRNA, NCT01234567)을 대문자로 바꾸고
+    구분 기호를 제거. 소문자로만 쓴 약물명 등은 포함되지 않으므로 임베딩 유사도로만 구분됨
+    """
+    entities = set()
+    for token in TOKEN_PATTERN.findall(text):
+        if any(c.isdigit() for c in token) or sum(c.isupper() for c in token) >= 2:
+            entities.add(re.sub(r"[\-/.]", "", token.upper()))
+    return " ".join(sorted(entities))
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+class AnswerCache:
+    """SQLite에 저장되는 질문 임베딩 → 답변 캐시"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, question TEXT NOT NULL, model TEXT NOT NULL, "
+                "backend TEXT NOT NULL, embedding TEXT NOT NULL, answer TEXT NOT NULL, sources TEXT NOT NULL, "
+                "created_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, entities TEXT)"
+            )
+            # 이전 버전 DB에는 entities 컬럼이 없음 (기존 항목은 NULL이라 더 이상 사용되지 않음)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(answers)")}
+            if "entities" not in columns:
+                conn.execute("ALTER TABLE answers ADD COLUMN entities TEXT")
+            # 조회 조건(모델, 식별자, 생성 시각)으로 후보만 읽도록 index 사용
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_lookup "
+                         "ON answers (model, backend, entities, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS answers_question ON answers (model, question)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def lookup(self, question: str, model: str, exact: bool = False) -> Optional[dict]:
+        """대상 식별자가 같은 항목 중 가장 유사한 유효 답변 (임계값 미만이거나 만료되었으면 None)
+
+        exact=True이면 임베딩을 사용하지 않고 같은 질문 문자열로 저장된 답변만 반환
+        (템플릿으로 만든 batch 질문처럼 대상만 다르고 문장이 거의 같은 경우)
+        """
+        now = time.time()
+        if exact:
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT id, question, NULL, answer, sources, created_at FROM answers "
+                    "WHERE model = ? AND question = ? AND created_at > ?",
+                    (model, question, now - ANSWER_CACHE_TTL),
+                ).fetchall()
+            vector, threshold = None, 1.0
+        else:
+            backend, vector = embed(question)
+            threshold = FALLBACK_SIMILARITY_THRESHOLD if backend == "ngram" else SIMILARITY_THRESHOLD
+            with closing(self._connect()) as conn:
+                rows = conn.execute(
+                    "SELECT id, question, embedding, answer, sources, created_at FROM answers "
+                    "WHERE model = ? AND backend = ? AND entities = ? AND created_at > ? "
+                    "ORDER BY created_at DESC LIMIT ?",
+                    (model, backend, entity_key(question), now - ANSWER_CACHE_TTL, MAX_CANDIDATES),
+                ).fetchall()
+
+        best = None
+        for row_id, cached_question, embedding, answer, sources, created_at in rows:
+            similarity = 1.0 if vector is None else _cosine(vector, json.loads(embedding))
+            if similarity >= threshold and (best is None or similarity > best["similarity"]):
+                best = {
+                    "id": row_id,
+                    "question": cached_question,
+                    "answer": answer,
+                    "sources": json.loads(sources),
+                    "created_at": created_at,
+                    "similarity": similarity,
+                    "stale": now - created_at > ANSWER_STALE_AFTER,
+                }
+
+        if best is not None:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("UPDATE answers SET hits = hits + 1 WHERE id = ?", (best["id"],))
+            logger.info(f"Answer cache hit ({best['similarity']:.3f}): {best['question']}")
+        return best
+
+    def store(self, question: str, model: str, answer: str, sources: Optional[dict] = None):
+        """답변 저장 (같은 모델의 동일 질문 기존 항목은 교체)"""
+        backend, vector = embed(question)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM answers WHERE question = ? AND model = ?", (question, model))
+            conn.execute(
+                "INSERT INTO answers (question, model, backend, embedding, answer, sources, created_at, entities) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (question, model, backend, json.dumps(vector), answer,
+                 json.dumps(sources or {}, ensure_ascii=False, default=str), time.time(), entity_key(question)),
+            )
+            conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - ANSWER_CACHE_TTL,))
+
+_cache: Optional[AnswerCache] = None
+
+def get_cache() -> Optional[AnswerCache]:
+    """공유 캐시 인스턴스 (생성 실패 시 None)"""
+    global _cache
+    if _cache is None:
+        try:
+            _cache = AnswerCache(ANSWER_CACHE_PATH)
+        except Exception as e:
+            logger.warning(f"Answer cache disabled: {e}")
+    return _cache
@@ -0,0 +1,251 @@
+"""
+Streamlit 없이 사용하는 HTTP API 서버 (FastAPI)
+- POST /v1/research: 멀티 에이전트 연구 답변 (SSE 스트리밍 또는 JSON)
+- POST /v1/fast-report: 빠른 보고서
+- /v1/jobs: 작업 큐(jobs.py) 제출, 조회, 이벤트 스트리밍(Last-Event-ID로 이어받기), 취소
+- MCP 클라이언트는 프로세스별 풀(chat.get_mcp_pool())에서 빌려 요청 간에 재사용
+
+실행 (저장소 루트에서, MCP 서버 경로가 application/ 기준이므로):
+    uvicorn api_server:app --app-dir application --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+
+import chat
+import chat_fast
+import jobs
+import metrics
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("api_server")
+
+API_MODEL = os.getenv("API_MODEL", chat.model_name)
+API_REASONING = os.getenv("API_REASONING", "Disable")
+# 모든 MCP 클라이언트 세트가 사용 중일 때 기다리는 최대 시간 (초)
+MCP_CHECKOUT_TIMEOUT = float(os.getenv("MCP_CHECKOUT_TIMEOUT", "60"))
+
+# error 이벤트의 code -> JSON 응답(stream=false)의 HTTP status (code가 없으면 500)
+POOL_EXHAUSTED = "pool_exhausted"
+ERROR_STATUS = {POOL_EXHAUSTED: 503}
+# 프록시/로드 밸런서가 유휴 연결을 끊지 않도록 보내는 SSE 주석 주기 (초)
+SSE_KEEPALIVE = 15.0
+
+chat.update(API_MODEL, API_REASONING)
+
+app = FastAPI(title="Drug Discovery Research Assistant API")
+
+class ResearchRequest(BaseModel):
+    question: str
+    stream: bool = True
+    force_refresh: bool = False
+
+class FastReportRequest(BaseModel):
+    question: str
+    stream: bool = True
+
+class JobRequest(BaseModel):
+    question: str
+    user_id: str = "api"
+    kind: str = "research"
+
+def _sse(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _sse_frames(events):
+    """(event, payload) 튜플을 SSE 메시지로 변환 (event가 None이면 keepalive 주석)"""
+    try:
+        async for event, payload in events:
+            yield ": keepalive\n\n" if event is None else _sse(event, payload)
+    finally:
+        await events.aclose()
+
+def _event_stream(generator) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _research_events(question: str, force_refresh: bool):
+    hit = await asyncio.to_thread(chat.lookup_cached_answer, question, force_refresh)
+    if hit is not None:
+        yield ("cached", {"created_at": hit["created_at"], "stale": hit["stale"], "similarity": hit["similarity"]})
+        yield ("text", {"text": hit["answer"]})
+        yield ("done", {"model": chat.model_name, "cached": True})
+        return
+
+    pool = chat.get_mcp_pool()
+    try:
+        clients = await asyncio.to_thread(pool.checkout, MCP_CHECKOUT_TIMEOUT)
+    except TimeoutError:
+        yield ("error", {"code": POOL_EXHAUSTED, "message": "server busy, try again later"})
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    sources = []
+    # API 요청은 서로 독립적이므로 공유 대화 기록을 사용하지 않음
+    task = asyncio.create_task(chat.generate_answer(question, "Disable", queue.put_nowait, clients=clients,
+                                                    sources=sources))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    healthy = False
+    try:
+        while True:
+            try:
+                text = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield (None, None)
+                continue
+            if text is None:
+                break
+            yield ("text", {"text": text})
+
+        try:
+            answer = task.result()
+        except Exception as e:
+            logger.error(f"Research request failed: {e}")
+            yield ("error", {"message": str(e)})
+            return
+        healthy = True
+        await asyncio.to_thread(chat.store_cached_answer, question, answer, sources)
+        yield ("done", {"model": chat.model_name, "cached": False})
+    finally:
+        # 클라이언트 연결이 끊기면 생성도 중단하고, 상태를 알 수 없는 MCP 세션은 버림
+        if not task.done():
+            task.cancel()
+            # 취소된 작업이 아직 worker 스레드에서 클라이언트를 사용 중일 수 있으므로 끝날 때까지 기다린 뒤 반납
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+        pool.checkin(clients, healthy=healthy)
+
+async def _fast_report_events(question: str):
+    try:
+        report = await asyncio.to_thread(chat_fast.run_fast_report, question)
+    except Exception as e:
+        logger.error(f"Fast report failed: {e}")
+        yield ("error", {"message": str(e)})
+        return
+    yield ("text", {"text": report})
+    yield ("done", {})
+
+async def _collect(events) -> dict:
+    """(event, payload) 이벤트를 모아 JSON 응답으로 변환 (stream=false)"""
+    text, result = [], {}
+    try:
+        async for event, data in events:
+            if event is None:
+                continue
+            if event == "text":
+                text.append(data["text"])
+            elif event == "error":
+                status_code = ERROR_STATUS.get(data.get("code"), 500)
+                raise HTTPException(status_code=status_code, detail=data["message"])
+            else:
+                result.update(data)
+    finally:
+        await events.aclose()
+    result["answer"] = "".join(text)
+    return result
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "model": chat.model_name}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = await asyncio.to_thread(metrics.render)
+    return Response(content=body, media_type=content_type)
+
+@app.post("/v1/research")
+async def research(request: ResearchRequest):
+    events = _research_events(request.question, request.force_refresh)
+    if request.stream:
+        return _event_stream(_sse_frames(events))
+    return await _collect(events)
+
+@app.post("/v1/fast-report")
+async def fast_report(request: FastReportRequest):
+    events = _fast_report_events(request.question)
+    if request.stream:
+        return _event_stream(_sse_frames(events))
+    return await _collect(events)
+
+@app.post("/v1/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    if request.kind not in ("research", "fast"):
+        raise HTTPException(status_code=400, detail="kind must be 'research' or 'fast'")
+    store = jobs.get_job_store()
+    job_id = await asyncio.to_thread(store.submit, request.user_id, request.question, request.kind, "Disable",
+                                     API_MODEL, API_REASONING)
+    return {"id": job_id, "status": "queued"}
+
+@app.get("/v1/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(jobs.get_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+@app.delete("/v1/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    cancelled = await asyncio.to_thread(jobs.get_job_store().cancel, job_id)
+    if not cancelled:
+        raise HTTPException(status_code=409, detail="job is not queued or running")
+    return {"id": job_id, "status": "cancelled"}
+
+@app.get("/v1/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    store = jobs.get_job_store()
+    if await asyncio.to_thread(store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    # 재연결한 EventSource는 마지막으로 받은 seq를 Last-Event-ID로 보냄
+    last_event_id = request.headers.get("last-event-id", "0")
+    after_seq = int(last_event_id) if last_event_id.isdigit() else 0
+
+    async def events():
+        nonlocal after_seq
+        idle = 0.0
+        while True:
+            batch = await asyncio.to_thread(store.events_since, job_id, after_seq)
+            for event in batch:
+                after_seq = event["seq"]
+                yield _sse(event["type"], {"data": event["data"]}, event_id=event["seq"])
+            if batch:
+                idle = 0.0
+                continue
+            job = await asyncio.to_thread(store.get, job_id)
+            if job["status"] in jobs.FINAL_STATUSES:
+                # 상태 확인 직전에 기록된 마지막 이벤트까지 전달
+                for event in await asyncio.to_thread(store.events_since, job_id, after_seq):
+                    yield _sse(event["type"], {"data": event["data"]}, event_id=event["seq"])
+                yield _sse("done", {"status": job["status"], "error": job["error"]})
+                return
+            await asyncio.sleep(jobs.POLL_INTERVAL)
+            idle += jobs.POLL_INTERVAL
+            if idle >= SSE_KEEPALIVE:
+                idle = 0.0
+                yield ": keepalive\n\n"
+
+    return _event_stream(events())
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("API_HOST", "0.0.0.0"), port=int(os.getenv("API_PORT", "8000")))  # nosec B104
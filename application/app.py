@@ -1,9 +1,12 @@
 import streamlit as st
 import chat
+import jobs
+import streaming
 import logging
 import sys
 import requests
 import random
+import uuid
 from datetime import datetime
 
 logging.basicConfig(
@@ -47,6 +50,13 @@ with st.sidebar:
     fast_mode = st.checkbox('⚡ 빠른 모드 (5분 이내, 간단한 보고서)', value=True)
     st.markdown('<small style="color:#666;">빠른 모드: 각 DB당 3-5개 결과, 직접적인 답변</small>', unsafe_allow_html=True)
 
+    # 캐시된 답변 대신 새로 생성
+    force_refresh = st.checkbox('🔄 캐시된 답변 사용 안 함 (새로 생성)', value=False)
+
+    # 작업 큐에서 실행하면 새로고침하거나 창을 닫아도 보고서 생성이 계속됨
+    background_mode = st.checkbox('📥 백그라운드 작업으로 실행 (새로고침해도 계속 진행)', value=False,
+                                  help='작업은 별도 worker 프로세스(python application/jobs.py)가 처리합니다.')
+
     chat.update(modelName, reasoningMode)
     
     clear_button = st.button("🗑️ 대화 초기화", key="clear")
@@ -194,6 +204,50 @@ st.markdown("---")
 if clear_button is True:
     chat.initiate()
 
+# 새로고침 후에도 작업을 이어받을 수 있도록 사용자 ID와 진행 중인 작업 ID를 URL에 보관
+if "uid" not in st.query_params:
+    st.query_params["uid"] = uuid.uuid4().hex
+user_id = st.query_params["uid"]
+
+def follow_background_job(job_id):
+    """작업 큐의 진행 이벤트를 렌더링하고 최종 답변 반환"""
+    store = jobs.get_job_store()
+    position = store.queue_position(job_id)
+    status_placeholder = st.empty()
+    if position:
+        status_placeholder.caption(f"⏳ 대기 중 (순서: {position})")
+
+    message_placeholder = st.empty()
+    renderer = streaming.StreamRenderer(message_placeholder.container())
+    future = streaming.run_in_background(jobs.follow_job(store, job_id, renderer.feed))
+    job = renderer.run(future)
+    status_placeholder.empty()
+
+    if "job" in st.query_params:
+        del st.query_params["job"]
+
+    if job is None:
+        message_placeholder.markdown("작업을 찾을 수 없습니다.")
+        return ""
+    if job["status"] == "failed":
+        message_placeholder.markdown(f"Sorry, an error occurred while generating the response. ({job['error']})")
+        return ""
+    if job["status"] == "cancelled":
+        message_placeholder.markdown("작업이 취소되었습니다.")
+        return ""
+    return job["result"] or renderer.text
+
+def generate_response(prompt):
+    # 방금 추가한 질문 외에 이전 대화가 있으면 후속 질문으로 보고 캐시된 답변을 사용하지 않음
+    has_history = len(st.session_state.messages) > 1
+    if background_mode:
+        job_id = jobs.get_job_store().submit(user_id, prompt, kind="research", history_mode="Disable",
+                                             model_name=modelName, reasoning_mode=reasoningMode,
+                                             force_refresh=force_refresh or has_history)
+        st.query_params["job"] = job_id
+        return follow_background_job(job_id)
+    return chat.run_multi_agent_system(prompt, "Enable", st, force_refresh=force_refresh, has_history=has_history)
+
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -225,6 +279,19 @@ if not st.session_state.greetings:
         st.session_state.messages.append({"role": "assistant", "content": intro})
         st.session_state.greetings = True
 
+# 새로고침 전에 실행 중이던 작업이 있으면 이어서 표시
+if "job" in st.query_params:
+    resumed_job = jobs.get_job_store().get(st.query_params["job"])
+    if resumed_job is not None and resumed_job["user_id"] == user_id:
+        with st.chat_message("user"):
+            st.markdown(resumed_job["question"])
+        st.session_state.messages.append({"role": "user", "content": resumed_job["question"]})
+        with st.chat_message("assistant"):
+            response = follow_background_job(resumed_job["id"])
+        st.session_state.messages.append({"role": "assistant", "content": response})
+    else:
+        del st.query_params["job"]
+
 if clear_button or "messages" not in st.session_state:
     st.session_state.messages = []        
     st.session_state.greetings = False
@@ -245,7 +312,7 @@ if prompt := st.chat_input("메시지를 입력하세요."):
         sessionState = ""
         chat.references = []
         chat.image_url = []
-        response = chat.run_multi_agent_system(prompt, "Enable", st)
+        response = generate_response(prompt)
 
     st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -262,7 +329,7 @@ if "selected_question" in st.session_state and st.session_state.selected_questio
         sessionState = ""
         chat.references = []
         chat.image_url = []
-        response = chat.run_multi_agent_system(prompt, "Enable", st)
+        response = generate_response(prompt)
     
     st.session_state.messages.append({"role": "assistant", "content": response})
     st.rerun()
@@ -0,0 +1,234 @@
+"""
+여러 타겟/질문에 대한 보고서를 한 번에 생성하는 batch 실행기
+- CSV(target 또는 question 열) 또는 한 줄에 하나씩 적은 텍스트 파일을 입력으로 사용
+- 동시 실행 수를 제한하여 파이프라인을 병렬 실행 (MCP 클라이언트 풀, 답변 캐시 공유)
+- 완료된 항목은 progress.jsonl에 기록되므로 중단 후 다시 실행하면 남은 항목만 처리
+- 항목별 보고서(reports/*.md)와 요약 색인(index.md, index.csv) 생성
+
+사용 예 (저장소 루트에서):
+    python application/batch.py targets.csv --output batch_output --concurrency 4
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import List
+
+import chat
+import chat_fast
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("batch")
+
+DEFAULT_TEMPLATE = "{target}에 대한 최신 연구와 관련 화합물 보고서를 생성해주세요"
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 10.0
+
+def load_items(path: str, template: str) -> List[dict]:
+    """입력 파일에서 (target, question) 목록 읽기 (중복 질문은 한 번만)"""
+    items = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+                target = row.get("target", "")
+                question = row.get("question") or (template.format(target=target) if target else "")
+                if question:
+                    items.append({"target": target or question, "question": question})
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    items.append({"target": line, "question": template.format(target=line)})
+
+    seen = set()
+    unique = []
+    for item in items:
+        item["key"] = hashlib.sha256(item["question"].encode("utf-8")).hexdigest()[:16]
+        if item["key"] not in seen:
+            seen.add(item["key"])
+            unique.append(item)
+    return unique
+
+def _slug(text: str) -> str:
+    slug = re.sub(r"[^\w\-]+", "_", text, flags=re.UNICODE).strip("_")
+    return slug[:60] or "item"
+
+class BatchRun:
+    """출력 디렉터리와 진행 기록(progress.jsonl) 관리"""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.reports_dir = os.path.join(output_dir, "reports")
+        self.progress_path = os.path.join(output_dir, "progress.jsonl")
+        os.makedirs(self.reports_dir, exist_ok=True)
+
+    def completed(self) -> dict:
+        """이전 실행에서 완료된 항목 (key -> 기록). 보고서 파일이 없으면 다시 생성"""
+        done = {}
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 중단 시 마지막 줄이 잘렸을 수 있음
+                    if record["status"] == "done" and os.path.exists(os.path.join(self.output_dir, record["report"])):
+                        done[record["key"]] = record
+                    elif record["key"] in done and record["status"] != "done":
+                        done.pop(record["key"])
+        return done
+
+    def record(self, record: dict):
+        with open(self.progress_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_report(self, index: int, item: dict, content: str) -> str:
+        relative = os.path.join("reports", f"{index:03d}_{_slug(item['target'])}.md")
+        path = os.path.join(self.output_dir, relative)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(f"# {item['target']}\n\n> {item['question']}\n\n{content}\n")
+        os.replace(path + ".tmp", path)
+        return relative
+
+    def write_index(self, items: List[dict], records: dict):
+        with open(os.path.join(self.output_dir, "index.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["target", "question", "status", "seconds", "cached", "report", "error"])
+            for item in items:
+                record = records.get(item["key"], {})
+                writer.writerow([item["target"], item["question"], record.get("status", "pending"),
+                                 record.get("seconds", ""), record.get("cached", ""),
+                                 record.get("report", ""), record.get("error", "")])
+
+        done = sum(1 for item in items if records.get(item["key"], {}).get("status") == "done")
+        lines = [
+            "# Batch report index",
+            "",
+            f"- 생성 시각: {time.strftime('%Y-%m-%d %H:%M')}",
+            f"- 모델: {chat.model_name}",
+            f"- 완료: {done}/{len(items)}",
+            "",
+            "| # | Target | Status | Time (s) | Report |",
+            "|---|--------|--------|----------|--------|",
+        ]
+        for index, item in enumerate(items, 1):
+            record = records.get(item["key"], {})
+            status = record.get("status", "pending")
+            report = f"[보고서]({record['report']})" if record.get("report") else record.get("error", "")
+            lines.append(f"| {index} | {item['target']} | {status} | {record.get('seconds', '')} | {report} |")
+        with open(os.path.join(self.output_dir, "index.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+async def _generate(item: dict, mode: str, force_refresh: bool):
+    """보고서 본문과 캐시 사용 여부"""
+    if mode == "fast":
+        return await asyncio.to_thread(chat_fast.run_fast_report, item["question"]), False
+
+    # 템플릿 질문은 대상만 다르고 문장이 같아 유사도 검색이 다른 대상의 답변을 찾을 수 있으므로 같은 질문만 재사용
+    hit = await asyncio.to_thread(chat.lookup_cached_answer, item["question"], force_refresh, True)
+    if hit is not None:
+        return hit["answer"], True
+
+    pool = chat.get_mcp_pool()
+    clients = await asyncio.to_thread(pool.checkout)
+    healthy = False
+    sources = []
+    try:
+        answer = await chat.generate_answer(item["question"], "Disable", lambda text: None, clients=clients,
+                                            sources=sources)
+        healthy = True
+    finally:
+        pool.checkin(clients, healthy=healthy)
+    await asyncio.to_thread(chat.store_cached_answer, item["question"], answer, sources)
+    return answer, False
+
+async def run_batch(items: List[dict], run: BatchRun, concurrency: int, mode: str = "research",
+                    force_refresh: bool = False) -> dict:
+    """남은 항목을 최대 concurrency개씩 동시에 처리하고 전체 기록 반환"""
+    records = run.completed()
+    pending = [(index, item) for index, item in enumerate(items, 1) if item["key"] not in records]
+    logger.info(f"{len(items)} item(s), {len(items) - len(pending)} already done, {len(pending)} to run")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(index: int, item: dict):
+        async with semaphore:
+            started = time.monotonic()
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                try:
+                    content, cached = await _generate(item, mode, force_refresh)
+                    if not content.strip():
+                        raise RuntimeError("empty response")
+                    break
+                except Exception as e:
+                    logger.warning(f"[{index}] {item['target']} failed (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                    if attempt == MAX_ATTEMPTS:
+                        record = {"key": item["key"], "target": item["target"], "status": "failed", "error": str(e)}
+                        run.record(record)
+                        records[item["key"]] = record
+                        return
+                    await asyncio.sleep(RETRY_BACKOFF * attempt)
+
+            record = {
+                "key": item["key"],
+                "target": item["target"],
+                "status": "done",
+                "seconds": round(time.monotonic() - started, 1),
+                "cached": cached,
+                "report": run.write_report(index, item, content),
+            }
+            run.record(record)
+            records[item["key"]] = record
+            logger.info(f"[{index}/{len(items)}] {item['target']} done in {record['seconds']}s")
+
+    await asyncio.gather(*(process(index, item) for index, item in pending))
+    run.write_index(items, records)
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate research reports for a list of targets")
+    parser.add_argument("input", help="CSV file with a 'target' or 'question' column, or a text file with one target per line")
+    parser.add_argument("--output", default="batch_output", help="output directory (reused to resume a run)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--mode", choices=["research", "fast"], default="research")
+    parser.add_argument("--model", default=chat.model_name, help="model name from info.py")
+    parser.add_argument("--template", default=DEFAULT_TEMPLATE, help="question template for targets")
+    parser.add_argument("--force-refresh", action="store_true", help="ignore cached answers")
+    args = parser.parse_args()
+
+    chat.update(args.model, "Disable")
+    # 동시에 실행되는 항목마다 MCP 클라이언트 세트 하나씩
+    chat.MCP_POOL_SIZE = args.concurrency
+
+    items = load_items(args.input, args.template)
+    run = BatchRun(args.output)
+    started = time.monotonic()
+    try:
+        records = asyncio.run(run_batch(items, run, args.concurrency, args.mode, args.force_refresh))
+    finally:
+        chat.get_mcp_pool().close()
+
+    failed = [record for record in records.values() if record["status"] != "done"]
+    logger.info(f"Finished in {time.monotonic() - started:.0f}s: {len(records) - len(failed)} done, {len(failed)} failed")
+    logger.info(f"Index: {os.path.join(args.output, 'index.md')}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Region-aware Bedrock model routing
+- info.py의 모델 프로필(리전별 model_id)을 기반으로 리전별 BedrockModel 생성
+- 리전별 지연 시간(EWMA)과 throttling을 추적하여 가장 건강한 리전으로 요청
+- 응답 시작 전 ThrottlingException이 발생하면 다음 리전으로 즉시 failover
+- 같은 설정의 모델(boto 클라이언트, 연결 풀 포함)은 에이전트/사용자 간에 재사용
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from strands.models import BedrockModel
+
+import metrics
+import tracing
+
+try:
+    from strands.types.exceptions import ModelThrottledException
+except ImportError:  # older strands releases
+    ModelThrottledException = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("bedrock_router")
+
+# EWMA 가중치 (최근 요청 반영 비율)
+LATENCY_EWMA_ALPHA = 0.3
+# throttling 이후 해당 리전을 후순위로 미루는 시간 (초)
+THROTTLE_COOLDOWN = 30.0
+
+def _is_throttle(error: Exception) -> bool:
+    if ModelThrottledException is not None and isinstance(error, ModelThrottledException):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in ("ThrottlingException", "TooManyRequestsException")
+    return "ThrottlingException" in str(error)
+
+class RegionRouter:
+    """리전별 상태(지연 시간, throttling)를 추적하고 우선순위를 결정"""
+
+    def __init__(self, regions: List[str], ewma_alpha: float = LATENCY_EWMA_ALPHA,
+                 throttle_cooldown: float = THROTTLE_COOLDOWN):
+        self.regions = list(regions)
+        self.ewma_alpha = ewma_alpha
+        self.throttle_cooldown = throttle_cooldown
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Optional[float]] = {region: None for region in self.regions}
+        self._throttled_until: Dict[str, float] = {region: 0.0 for region in self.regions}
+        self._throttle_count: Dict[str, int] = {region: 0 for region in self.regions}
+
+    def ranked(self) -> List[str]:
+        """건강한 순서로 정렬된 리전 목록 (cooldown 중인 리전은 뒤로, 그 안에서는 지연 시간 순)"""
+        now = time.monotonic()
+        with self._lock:
+            def score(item):
+                index, region = item
+                cooling = self._throttled_until[region] > now
+                latency = self._latency[region]
+                # 측정 전 리전은 설정 순서를 유지하되 측정된 리전과 비교 가능하도록 0으로 취급
+                return (cooling, latency if latency is not None else 0.0, index)
+            return [region for _, region in sorted(enumerate(self.regions), key=score)]
+
+    def record_success(self, region: str, latency: float):
+        with self._lock:
+            previous = self._latency[region]
+            self._latency[region] = latency if previous is None else (
+                self.ewma_alpha * latency + (1 - self.ewma_alpha) * previous
+            )
+
+    def record_throttle(self, region: str):
+        with self._lock:
+            self._throttle_count[region] += 1
+            self._throttled_until[region] = time.monotonic() + self.throttle_cooldown
+        metrics.record_upstream_error("bedrock", throttled=True)
+        logger.warning(f"Bedrock throttled in {region}, cooling down for {self.throttle_cooldown}s")
+
+    def status(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                region: {
+                    "latency_ewma": self._latency[region],
+                    "throttles": self._throttle_count[region],
+                    "cooling_down": self._throttled_until[region] > now,
+                }
+                for region in self.regions
+            }
+
+_routers: Dict[str, RegionRouter] = {}
+_routers_lock = threading.Lock()
+
+def get_router(name: str, regions: List[str]) -> RegionRouter:
+    """모델 이름별로 공유되는 router (사용자/에이전트 간 상태 공유)"""
+    with _routers_lock:
+        router = _routers.get(name)
+        if router is None or router.regions != list(regions):
+            router = RegionRouter(regions)
+            _routers[name] = router
+        return router
+
+# (모델 종류, 리전, model_id, 설정) -> 모델 인스턴스
+_models: Dict[str, BedrockModel] = {}
+_models_lock = threading.Lock()
+
+def _model_key(*parts) -> str:
+    return json.dumps(parts, sort_keys=True, default=str)
+
+def get_bedrock_model(region: Optional[str], model_id: str, boto_config: dict, **params) -> BedrockModel:
+    """설정별로 하나만 만들어 공유하는 BedrockModel
+
+    boto3 클라이언트는 thread-safe하고 모델은 요청 상태를 갖지 않으므로
+    여러 에이전트와 사용자가 같은 인스턴스를 사용해도 됩니다.
+    region이 None이면 기본 AWS 리전을 사용합니다.
+    """
+    key = _model_key("single", region, model_id, boto_config, params)
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            logger.info(f"Creating Bedrock client: {model_id} ({region or 'default region'})")
+            model = BedrockModel(
+                region_name=region,
+                boto_client_config=Config(**boto_config),
+                model_id=model_id,
+                **params,
+            )
+            _models[key] = model
+        return model
+
+def get_routed_model(name: str, profiles: List[dict], boto_config: dict, **params) -> "RoutedBedrockModel":
+    """모델 이름과 설정별로 공유되는 RoutedBedrockModel"""
+    key = _model_key("routed", name, profiles, boto_config, params)
+    with _models_lock:
+        model = _models.get(key)
+    if model is None:
+        router = get_router(name, [profile["bedrock_region"] for profile in profiles])
+        model = RoutedBedrockModel(profiles=profiles, router=router, boto_config=boto_config, **params)
+        with _models_lock:
+            model = _models.setdefault(key, model)
+    return model
+
+class RoutedBedrockModel(BedrockModel):
+    """여러 리전의 BedrockModel을 묶어 가장 건강한 리전으로 요청하는 모델
+
+    첫 번째 프로필의 리전으로 초기화되어 config 조회 등은 BedrockModel과 동일하게 동작합니다.
+    """
+
+    def __init__(self, profiles: List[dict], router: RegionRouter, boto_config: dict, **params):
+        primary = profiles[0]
+        super().__init__(
+            region_name=primary["bedrock_region"],
+            boto_client_config=Config(**boto_config),
+            model_id=primary["model_id"],
+            **params,
+        )
+        self.router = router
+        self._primary_region = primary["bedrock_region"]
+        self._profiles = {profile["bedrock_region"]: profile for profile in profiles}
+        self._boto_config = boto_config
+        self._params = params
+
+    def _model_for(self, region: str) -> BedrockModel:
+        return get_bedrock_model(region, self._profiles[region]["model_id"], self._boto_config, **self._params)
+
+    async def _regional_stream(self, region: str, *args, **kwargs):
+        if region == self._primary_region:
+            async for event in super().stream(*args, **kwargs):
+                yield event
+        else:
+            async for event in self._model_for(region).stream(*args, **kwargs):
+                yield event
+
+    async def stream(self, *args, **kwargs):
+        regions = self.router.ranked()
+        for attempt, region in enumerate(regions):
+            started = time.monotonic()
+            first_event = True
+            # async generator 안에서는 yield 사이에 context가 바뀔 수 있으므로 현재 span으로 설정하지 않음
+            span = tracing.start_span("bedrock.stream", region=region,
+                                      model_id=self._profiles[region]["model_id"], attempt=attempt)
+            try:
+                async for event in self._regional_stream(region, *args, **kwargs):
+                    if first_event:
+                        latency = time.monotonic() - started
+                        self.router.record_success(region, latency)
+                        span.set_attribute("time_to_first_event_ms", round(latency * 1000, 1))
+                        first_event = False
+                    if isinstance(event, dict) and "metadata" in event:
+                        span.add_usage(event["metadata"].get("usage"))
+                    yield event
+                return
+            except Exception as e:
+                span.record_error(e)
+                # 응답이 시작된 뒤에는 다른 리전으로 넘길 수 없음
+                if not first_event or not _is_throttle(e):
+                    raise
+                self.router.record_throttle(region)
+                span.set_attribute("throttled", True)
+                if attempt == len(regions) - 1:
+                    raise
+                logger.info(f"Failing over from {region} to {regions[attempt + 1]}")
+            finally:
+                span.end()
@@ -1,24 +1,32 @@
 import info
+import bedrock_router
+import answer_cache
+import mcp_pool
+import mcp_transport
+import metrics
+import streaming
+import tracing
 import traceback
 import uuid
 import logging
 import datetime
 import sys
 import asyncio
+import contextlib
 import os
+import re
+import json
+import time
+from contextvars import ContextVar
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
-from botocore.config import Config
 from strands import Agent, tool
-from strands.models import BedrockModel
 from strands_tools import file_write
 from strands.agent.conversation_manager import SlidingWindowConversationManager
-from strands.tools.mcp import MCPClient
-from mcp import stdio_client, StdioServerParameters
 
 
 logging.basicConfig(
@@ -30,20 +38,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger("chat")
 
+metrics.enable()
+
 model_name = "Claude 3.7 Sonnet"
 model_type = "claude"
 debug_mode = "Enable"
 model_id = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
 models = info.get_model_info(model_name)
 reasoning_mode = 'Disable'
+references = []
+image_url = []
 
 def update(modelName, reasoningMode):    
-    global model_name, model_id, model_type, reasoning_mode
+    global model_name, model_id, model_type, reasoning_mode, models
     
     if model_name != modelName:
         model_name = modelName
         logger.info(f"model_name: {model_name}")
         
+        models = info.get_model_info(model_name)
         model_id = models[0]["model_id"]
         model_type = models[0]["model_type"]
 
@@ -51,6 +64,24 @@ def update(modelName, reasoningMode):
         reasoning_mode = reasoningMode
         logger.info(f"reasoning_mode: {reasoning_mode}")
 
+# 작업 worker/API처럼 한 프로세스에서 여러 사용자의 요청을 동시에 처리할 때 요청별로 적용하는 모델 선택
+# (설정되지 않으면 update()로 지정한 프로세스 전역 설정 사용)
+_request_selection: ContextVar = ContextVar("model_selection", default=None)
+
+def selected_model():
+    """현재 요청에 적용되는 (모델 이름, 추론 모드)"""
+    selection = _request_selection.get()
+    return selection if selection is not None else (model_name, reasoning_mode)
+
+@contextlib.contextmanager
+def use_model(modelName, reasoningMode):
+    """with 블록(과 그 안에서 시작한 task/스레드) 동안 전역 설정 대신 지정한 모델과 추론 모드 사용"""
+    token = _request_selection.set((modelName or model_name, reasoningMode or reasoning_mode))
+    try:
+        yield
+    finally:
+        _request_selection.reset(token)
+
 def initiate():
     global userId    
     userId = uuid.uuid4().hex
@@ -59,14 +90,68 @@ def initiate():
 #########################################################
 # Strands Agent Model Configuration
 #########################################################
-def get_model():
-    profile = models[0]
-    if profile['model_type'] == 'nova':
+# 역할별 모델 tier
+# - "selected": 사용자가 선택한 모델 (종합 보고서, 오케스트레이터)
+# - "extraction": 키워드/이름 추출, 계획 수립 등 단순 작업
+# - "research": 검색 도구를 호출하고 결과를 요약하는 하위 에이전트
+ROLE_TIERS = {
+    "orchestrator": "selected",
+    "synthesis": "selected",
+    "planning": "extraction",
+    "chembl": "extraction",
+    "web_search": "research",
+    "arxiv": "research",
+    "pubmed": "research",
+    "clinicaltrials": "research",
+}
+TIER_MODELS = {
+    "extraction": os.getenv("EXTRACTION_MODEL", "Nova Micro"),
+    "research": os.getenv("RESEARCH_MODEL", "Claude 3.5 Haiku"),
+}
+# 역할별 모델 직접 지정 (예: {"pubmed": "Claude 3.7 Sonnet"}), tier보다 우선
+role_model_overrides = {}
+
+def set_role_model(role, modelName):
+    """특정 역할의 모델을 지정 (None이면 tier 기본값으로 복원)
+
+    알 수 없는 역할이나 모델 이름이면 ValueError
+    """
+    if role not in ROLE_TIERS:
+        raise ValueError(f"Unknown role: {role} (choose from {', '.join(ROLE_TIERS)})")
+    if modelName is not None and not info.get_model_info(modelName):
+        raise ValueError(f"Unknown model: {modelName}")
+    if modelName is None:
+        role_model_overrides.pop(role, None)
+    else:
+        role_model_overrides[role] = modelName
+    logger.info(f"role model override: {role} -> {modelName}")
+
+def get_role_model_name(role):
+    """역할에 사용할 모델 이름 (tier 모델이 선택한 모델보다 비싸면 선택한 모델 사용)"""
+    if role in role_model_overrides:
+        return role_model_overrides[role]
+    selected_name, _ = selected_model()
+    tier = ROLE_TIERS.get(role, "selected")
+    if tier == "selected":
+        return selected_name
+    tier_model = TIER_MODELS[tier]
+    if info.get_cost_rank(tier_model) >= info.get_cost_rank(selected_name):
+        return selected_name
+    return tier_model
+
+def get_model(role="orchestrator"):
+    selected_name, selected_reasoning = selected_model()
+    role_model_name = get_role_model_name(role)
+    profiles = info.get_model_info(role_model_name)
+    role_model_type = profiles[0]['model_type']
+    if role_model_type == 'nova':
         STOP_SEQUENCE = '"\n\n<thinking>", "\n<thinking>", " <thinking>"'
-    elif profile['model_type'] == 'claude':
+    elif role_model_type == 'claude':
         STOP_SEQUENCE = "\n\nHuman:" 
 
-    if model_type == 'claude':
+    if role_model_name != selected_name:
+        maxOutputTokens = 4096  # 하위 에이전트는 짧은 응답
+    elif role_model_type == 'claude':
         maxOutputTokens = 64000  # 4k
     else:
         maxOutputTokens = 5120  # 5k
@@ -74,14 +159,20 @@ def get_model():
     maxReasoningOutputTokens = 64000
     thinking_budget = min(maxOutputTokens, maxReasoningOutputTokens-1000)
 
-    if reasoning_mode == 'Enable':
-        model = BedrockModel(
-            boto_client_config=Config(
-               read_timeout=900,
-               connect_timeout=900,
-               retries=dict(max_attempts=3, mode="adaptive"),
-            ),
-            model_id=model_id,
+    if len(profiles) > 1:
+        # 여러 리전이 있으면 재시도로 오래 기다리지 않고 다른 리전으로 failover
+        retries = dict(max_attempts=2, mode="standard")
+    else:
+        retries = dict(max_attempts=3, mode="adaptive")
+    boto_config = dict(
+        read_timeout=900,
+        connect_timeout=900,
+        retries=retries,
+    )
+
+    # 추론 모드는 사용자가 선택한 Claude 모델에만 적용
+    if selected_reasoning == 'Enable' and role_model_name == selected_name and role_model_type == 'claude':
+        params = dict(
             max_tokens=64000,
             stop_sequences=[STOP_SEQUENCE],
             temperature=1,
@@ -93,35 +184,37 @@ def get_model():
             },
         )
     else:
-        model = BedrockModel(
-            boto_client_config=Config(
-               read_timeout=900,
-               connect_timeout=900,
-               retries=dict(max_attempts=3, mode="adaptive"),
-            ),
-            model_id=model_id,
+        params = dict(
             max_tokens=maxOutputTokens,
             stop_sequences=[STOP_SEQUENCE],
             temperature=0.1,
             top_p=0.9,
-            additional_request_fields={
+        )
+        if role_model_type == 'claude':
+            params["additional_request_fields"] = {
                 "thinking": {
                     "type": "disabled"
                 }
             }
-        )
+
+    # 리전별 클라이언트를 지연 시간/throttling 기준으로 선택하며,
+    # 같은 설정의 모델은 모든 에이전트와 사용자가 공유 (클라이언트/TLS 재생성 방지)
+    model = bedrock_router.get_routed_model(
+        role_model_name,
+        profiles,
+        boto_config,
+        **params
+    )
     return model
 
 conversation_manager = SlidingWindowConversationManager(
     window_size=10,  
 )
 
-# MCP Clients for various scientific databases
 # MCP Clients for various scientific databases
 # Google Scholar client - 무료 (rate limit 있음)
-google_scholar_mcp_client = MCPClient(lambda: stdio_client(
-    StdioServerParameters(command="python", args=["application/mcp_server_google_scholar.py"])
-))
+# MCP_TRANSPORT가 stdio이면 서버 프로세스를 직접 실행하고, 그 외에는 launcher가 띄운 공유 서버에 연결
+google_scholar_mcp_client = mcp_transport.create_client("google_scholar")
 
 # Google Search client - optional (requires API key)
 google_search_mcp_client = None
@@ -132,9 +225,7 @@ try:
     if (os.getenv("GOOGLE_API_KEY") and os.getenv("GOOGLE_CSE_ID") and 
         os.getenv("GOOGLE_API_KEY") != "YOUR_GOOGLE_API_KEY_HERE" and 
         os.getenv("GOOGLE_CSE_ID") != "YOUR_GOOGLE_CSE_ID_HERE"):
-        google_search_mcp_client = MCPClient(lambda: stdio_client(
-            StdioServerParameters(command="python", args=["application/mcp_server_google_search.py"])
-        ))
+        google_search_mcp_client = mcp_transport.create_client("google_search")
         logger.info("Google Search client initialized successfully")
     else:
         logger.info("Google Search API key not found - web search will be disabled")
@@ -149,9 +240,7 @@ try:
     import os
     load_dotenv()
     if os.getenv("TAVILY_API_KEY") and os.getenv("TAVILY_API_KEY") != "YOUR_API_KEY_HERE":
-        tavily_mcp_client = MCPClient(lambda: stdio_client(
-            StdioServerParameters(command="python", args=["application/mcp_server_tavily.py"])
-        ))
+        tavily_mcp_client = mcp_transport.create_client("tavily")
         logger.info("Tavily client initialized successfully")
     else:
         logger.info("Tavily API key not found or placeholder - Tavily search will be disabled")
@@ -159,27 +248,41 @@ except Exception as e:
     logger.warning(f"Tavily client initialization failed: {e}")
     tavily_mcp_client = None
 
-arxiv_mcp_client = MCPClient(lambda: stdio_client(
-    StdioServerParameters(command="python", args=["application/mcp_server_arxiv.py"])
-))
+arxiv_mcp_client = mcp_transport.create_client("arxiv")
+
+pubmed_mcp_client = mcp_transport.create_client("pubmed")
 
-pubmed_mcp_client = MCPClient(lambda: stdio_client(
-    StdioServerParameters(command="python", args=["application/mcp_server_pubmed.py"])
-))
+chembl_mcp_client = mcp_transport.create_client("chembl")
 
-chembl_mcp_client = MCPClient(lambda: stdio_client(
-    StdioServerParameters(command="python", args=["application/mcp_server_chembl.py"])
-))
+clinicaltrials_mcp_client = mcp_transport.create_client("clinicaltrials")
 
-clinicaltrials_mcp_client = MCPClient(lambda: stdio_client(
-    StdioServerParameters(command="python", args=["application/mcp_server_clinicaltrial.py"])
-))
+def create_mcp_clients():
+    """요청마다 사용할 새 MCP 클라이언트 목록 (동시에 실행되는 요청끼리 세션을 공유하지 않음)"""
+    names = ["google_scholar", "arxiv", "pubmed", "chembl", "clinicaltrials"]
+    if google_search_mcp_client:
+        names.append("google_search")
+    if tavily_mcp_client:
+        names.append("tavily")
+
+    return {name: mcp_transport.create_client(name) for name in names}
+
+# 서버 모드(API, 작업 worker)에서 요청 간에 재사용하는 MCP 클라이언트 세트 수
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "4"))
+_mcp_client_pool = None
+
+def get_mcp_pool():
+    """프로세스에서 공유하는 MCP 클라이언트 풀"""
+    global _mcp_client_pool
+    if _mcp_client_pool is None:
+        _mcp_client_pool = mcp_pool.MCPClientPool(create_mcp_clients, MCP_POOL_SIZE)
+    return _mcp_client_pool
 
 #########################################################
 # Specialized Tool Agents
 #########################################################
 
 @tool
+@tracing.traced(kind="agent")
 def planning_agent(query: str) -> str:
     """
     A specialized planning agent that analyzes the research query and determines 
@@ -208,7 +311,7 @@ def planning_agent(query: str) -> str:
            - Expected information to extract
         """
         
-        model = get_model()
+        model = get_model("planning")
         planner = Agent(
             model=model,
             system_prompt=planning_system,
@@ -227,12 +330,14 @@ def planning_agent(query: str) -> str:
         """
         
         response = planner(planning_prompt)
+        tracing.record_usage(response)
         return str(response)
     except Exception as e:
         logger.error(f"Error in planning agent: {e}")
         return f"Error in planning agent: {str(e)}"
 
 @tool
+@tracing.traced(kind="agent")
 def web_search_agent(query: str, search_type: str = "general", active_client=None) -> str:
     """
     Specialized agent for searching the web using Tavily's search engine.
@@ -258,7 +363,7 @@ def web_search_agent(query: str, search_type: str = "general", active_client=Non
         7. Summarize and highlight key information from search results
         """
         
-        model = get_model()
+        model = get_model("web_search")
         
         # Initialize tools
         tools = []
@@ -292,6 +397,7 @@ def web_search_agent(query: str, search_type: str = "general", active_client=Non
             
         # Execute the search
         response = web_agent(enhanced_query)
+        tracing.record_usage(response)
         
         return str(response)
     except Exception as e:
@@ -299,6 +405,7 @@ def web_search_agent(query: str, search_type: str = "general", active_client=Non
         return f"Error in web search agent: {str(e)}"
 
 @tool
+@tracing.traced(kind="agent")
 def arxiv_research_agent(query: str, active_client=None) -> str:
     """
     Specialized agent for searching Arxiv database for scientific papers.
@@ -320,7 +427,7 @@ def arxiv_research_agent(query: str, active_client=None) -> str:
         4. Return structured, well-cited information
         """
         
-        model = get_model()
+        model = get_model("arxiv")
         
         # Initialize tools
         tools = []
@@ -345,12 +452,14 @@ def arxiv_research_agent(query: str, active_client=None) -> str:
         )
         
         response = arxiv_agent(query)
+        tracing.record_usage(response)
         return str(response)
     except Exception as e:
         logger.error(f"Error in arxiv research agent: {e}")
         return f"Error in arxiv research agent: {str(e)}"
 
 @tool
+@tracing.traced(kind="agent")
 def pubmed_research_agent(query: str, active_client=None) -> str:
     """
     Specialized agent for searching PubMed database for medical papers.
@@ -372,7 +481,7 @@ def pubmed_research_agent(query: str, active_client=None) -> str:
         4. Return structured, well-cited information with PMID references
         """
         
-        model = get_model()
+        model = get_model("pubmed")
         
         # Initialize tools
         tools = []
@@ -397,12 +506,14 @@ def pubmed_research_agent(query: str, active_client=None) -> str:
         )
         
         response = pubmed_agent(query)
+        tracing.record_usage(response)
         return str(response)
     except Exception as e:
         logger.error(f"Error in pubmed research agent: {e}")
         return f"Error in pubmed research agent: {str(e)}"
 
 @tool
+@tracing.traced(kind="agent")
 def chembl_research_agent(query: str, active_client=None) -> str:
     """
     Specialized agent for searching ChEMBL database for compound information.
@@ -423,7 +534,7 @@ def chembl_research_agent(query: str, active_client=None) -> str:
         3. Return structured, well-formatted compound information with SMILES and activity information for the name
         """
         
-        model = get_model()
+        model = get_model("chembl")
         
         # Initialize tools
         tools = []
@@ -448,12 +559,14 @@ def chembl_research_agent(query: str, active_client=None) -> str:
         )
         
         response = chembl_agent(query)
+        tracing.record_usage(response)
         return str(response)
     except Exception as e:
         logger.error(f"Error in chembl research agent: {e}")
         return f"Error in chembl research agent: {str(e)}"
 
 @tool
+@tracing.traced(kind="agent")
 def clinicaltrials_research_agent(query: str, active_client=None) -> str:
     """
     Specialized agent for searching ClinicalTrials.gov database.
@@ -475,7 +588,7 @@ def clinicaltrials_research_agent(query: str, active_client=None) -> str:
         4. Return structured, well-formatted trial information with NCT identifiers
         """
         
-        model = get_model()
+        model = get_model("clinicaltrials")
         
         # Initialize tools
         tools = []
@@ -500,12 +613,14 @@ def clinicaltrials_research_agent(query: str, active_client=None) -> str:
         )
         
         response = clinicaltrials_agent(query)
+        tracing.record_usage(response)
         return str(response)
     except Exception as e:
         logger.error(f"Error in clinicaltrials research agent: {e}")
         return f"Error in clinicaltrials research agent: {str(e)}"
 
 @tool
+@tracing.traced(kind="agent")
 def synthesis_agent(research_results: str) -> str:
     """
     Specialized agent for synthesizing research findings into a comprehensive report.
@@ -535,7 +650,7 @@ def synthesis_agent(research_results: str) -> str:
         5. References (comprehensive listing of all sources)
         """
         
-        model = get_model()
+        model = get_model("synthesis")
         synthesis = Agent(
             model=model,
             system_prompt=system_prompt,
@@ -556,12 +671,14 @@ def synthesis_agent(research_results: str) -> str:
         """
         
         response = synthesis(synthesis_prompt)
+        tracing.record_usage(response)
         return str(response)
     except Exception as e:
         logger.error(f"Error in synthesis agent: {e}")
         return f"Error in synthesis agent: {str(e)}"
 
 @tool
+@tracing.traced()
 def generate_pdf_report(report_content: str, filename: str) -> str:
     try:
         # Ensure directory exists
@@ -626,6 +743,7 @@ def generate_pdf_report(report_content: str, filename: str) -> str:
 #########################################################
 # Orchestrator Agent - Multi-Agent Workflow
 #########################################################
+@tracing.traced()
 def create_orchestrator_agent(history_mode, google_scholar_client=None, google_search_client=None, tavily_client=None, arxiv_client=None, pubmed_client=None, chembl_client=None, clinicaltrials_client=None):
     # Orchestrator system prompt
     system = """
@@ -644,9 +762,12 @@ def create_orchestrator_agent(history_mode, google_scholar_client=None, google_s
     - "I'll create a comprehensive report..."
     
     JUST provide the findings directly and concisely.
+    
+    If a Google Scholar tool reports that Scholar is degraded, do not call
+    Google Scholar tools again for this question; use the other databases.
     """
     
-    model = get_model()
+    model = get_model("orchestrator")
     
     try:
         tools = [
@@ -754,114 +875,167 @@ def create_orchestrator_agent(history_mode, google_scholar_client=None, google_s
             tools=tools if 'tools' in locals() else []
         )
 
-def run_multi_agent_system(question, history_mode, st):
+def lookup_cached_answer(question, force_refresh=False, exact=False):
+    """현재 모델로 생성된 비슷한 질문의 답변 (없으면 None, exact=True이면 같은 질문만)"""
+    cache = answer_cache.get_cache()
+    if cache is None or force_refresh:
+        return None
+    try:
+        hit = cache.lookup(question, selected_model()[0], exact=exact)
+        tracing.set_attribute("cache_hit", hit is not None)
+        metrics.record_cache("answer", hit is not None)
+        return hit
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return None
+
+def store_cached_answer(question, answer, sources=None):
+    """답변과 출처 스냅샷 저장 (sources: generate_answer가 이 요청의 tool 결과에서 모은 출처)"""
+    cache = answer_cache.get_cache()
+    if cache is None or not answer:
+        return
+    try:
+        selected_name = selected_model()[0]
+        cache.store(question, selected_name, answer, {"model": selected_name, "references": list(sources or [])})
+    except Exception as e:
+        logger.warning(f"Answer cache store failed: {e}")
+
+# tool 결과에서 출처로 모을 식별자 (URL, DOI, PMID, NCT 번호, arXiv ID)
+SOURCE_PATTERNS = [
+    (re.compile(r"https?://[^\s<>\"'`)\]]+"), "{0}"),
+    (re.compile(r"\b(10\.\d{4,9}/[^\s<>\"'`)\]]+)"), "doi:{1}"),
+    (re.compile(r"\bPMID[:\s]*(\d{5,9})\b", re.IGNORECASE), "PMID:{1}"),
+    (re.compile(r"\b(NCT\d{8})\b"), "{1}"),
+    (re.compile(r"\barXiv[:\s]*(\d{4}\.\d{4,5}(?:v\d+)?)\b", re.IGNORECASE), "arXiv:{1}"),
+]
+MAX_SOURCES = 100
+
+def _collect_sources(event, sources):
+    """스트림 이벤트의 tool 결과에서 출처를 찾아 sources에 추가 (중복 제외, 순서 유지)"""
+    message = event.get("message")
+    if not isinstance(message, dict):
+        return
+    for block in message.get("content", []):
+        result = block.get("toolResult") if isinstance(block, dict) else None
+        if not result:
+            continue
+        for item in result.get("content", []):
+            text = item.get("text") if "text" in item else json.dumps(item.get("json", ""), ensure_ascii=False)
+            for pattern, template in SOURCE_PATTERNS:
+                for match in pattern.finditer(text or ""):
+                    source = template.format(match.group(0), *match.groups()).rstrip(".,;:")
+                    if source not in sources and len(sources) < MAX_SOURCES:
+                        sources.append(source)
+
+def _prepare_orchestrator(history_mode, clients, stack):
+    """MCP 서버 연결과 오케스트레이터 생성 (list_tools_sync 등 blocking 호출이므로 event loop 밖에서 실행)
+
+    clients가 없으면 새로 연결하고, 연결한 클라이언트는 stack이 닫힐 때 함께 종료
+    """
+    if clients is None:
+        # 사용 가능한 클라이언트만 연결 (웹 검색 클라이언트는 API 키가 있을 때만 포함)
+        with tracing.span("mcp.connect"):
+            clients = {name: stack.enter_context(client) for name, client in create_mcp_clients().items()}
+
+    return create_orchestrator_agent(
+        history_mode,
+        google_scholar_client=clients.get("google_scholar"),
+        google_search_client=clients.get("google_search"),
+        tavily_client=clients.get("tavily"),
+        arxiv_client=clients.get("arxiv"),
+        pubmed_client=clients.get("pubmed"),
+        chembl_client=clients.get("chembl"),
+        clinicaltrials_client=clients.get("clinicaltrials")
+    )
+
+async def generate_answer(question, history_mode, on_text, clients=None, sources=None):
+    """MCP 서버를 연결하고 오케스트레이터 답변을 생성 (Streamlit 없이 사용 가능)
+
+    MCP 연결과 tool 목록 조회는 worker 스레드에서 실행하므로, 같은 event loop의 다른 요청 스트리밍을 막지 않음
+
+    Args:
+        question: 사용자 질문
+        history_mode: 대화 기록 사용 여부 ("Enable" 또는 "Disable")
+        on_text: 생성되는 텍스트 조각마다 호출되는 함수
+        clients: 이미 연결된 MCP 클라이언트 (get_mcp_pool()에서 빌린 세트). 없으면 새로 연결
+        sources: 주어지면 tool 결과에 나온 출처(URL, DOI, PMID 등)를 이 목록에 추가
+
+    Returns:
+        전체 답변 문자열
+    """
+    full_response = ""
+    started = time.time()
+    stack = contextlib.ExitStack()
+    setup = None
+    try:
+        with tracing.span("request", question=question, model=selected_model()[0]) as request_span:
+            # to_thread는 contextvars를 복사하므로 mcp.connect span도 request 아래에 기록됨
+            setup = asyncio.ensure_future(asyncio.to_thread(_prepare_orchestrator, history_mode, clients, stack))
+            # 요청이 취소되어도 연결 작업은 끝까지 진행시키고 finally에서 정리
+            current_orchestrator = await asyncio.shield(setup)
+
+            with tracing.span("orchestrator", kind="agent") as orchestrator_span:
+                agent_stream = current_orchestrator.stream_async(question)
+                async for event in agent_stream:
+                    if "data" in event:
+                        if not full_response:
+                            request_span.set_attribute("time_to_first_text_ms", round((time.time() - started) * 1000, 1))
+                        full_response += event["data"]
+                        on_text(event["data"])
+                    if "result" in event:
+                        tracing.record_usage(event["result"])
+                    if sources is not None:
+                        _collect_sources(event, sources)
+                request_span.add_usage(orchestrator_span.attributes)
+    finally:
+        # 취소된 경우에도 연결 중인 스레드가 끝난 뒤에 클라이언트를 닫음 (종료도 blocking)
+        if setup is not None and not setup.done():
+            await asyncio.wait([setup])
+        await asyncio.to_thread(stack.close)
+    return full_response
+
+def run_multi_agent_system(question, history_mode, st, force_refresh=False, has_history=False):
+    """has_history: 이전 대화가 있는지 여부. 대화 기록을 사용하는 경우 후속 질문("더 자세히 설명해주세요")의
+    답변은 앞선 대화에 따라 달라지므로 답변 캐시를 조회하거나 저장하지 않음"""
     message_placeholder = st.empty()
     full_response = ""
+    completed = False
+    use_cache = not (history_mode == "Enable" and has_history)
+
+    # 비슷한 질문의 답변이 캐시되어 있으면 Bedrock 호출 없이 바로 표시
+    hit = lookup_cached_answer(question, force_refresh) if use_cache else None
+    if hit is not None:
+        created = datetime.datetime.fromtimestamp(hit["created_at"]).strftime("%Y-%m-%d %H:%M")
+        note = f"💾 {created}에 생성된 답변입니다."
+        if hit["stale"]:
+            note += " 최신 정보가 필요하면 새로 생성하세요."
+        st.caption(note)
+        message_placeholder.markdown(hit["answer"])
+        return hit["answer"]
+
+    # 에이전트는 백그라운드 event loop에서 실행하고, 토큰은 모아서 append-only로 렌더링
+    renderer = streaming.StreamRenderer(message_placeholder.container())
+    failed = False
+    sources = []
 
     async def process_streaming_response():
-        nonlocal full_response
+        nonlocal completed, failed
         try:
-            # 사용 가능한 웹 검색 클라이언트 확인
-            web_search_available = google_search_mcp_client or tavily_mcp_client
-            
-            if web_search_available:
-                # 웹 검색 가능한 경우
-                clients_context = []
-                if google_search_mcp_client:
-                    clients_context.append(google_search_mcp_client)
-                if tavily_mcp_client:
-                    clients_context.append(tavily_mcp_client)
-                
-                # 모든 클라이언트와 함께 실행
-                if google_search_mcp_client and tavily_mcp_client:
-                    with google_scholar_mcp_client as google_scholar_client, google_search_mcp_client as google_search_client, tavily_mcp_client as tavily_client, \
-                         arxiv_mcp_client as arxiv_client, pubmed_mcp_client as pubmed_client, \
-                         chembl_mcp_client as chembl_client, clinicaltrials_mcp_client as clinicaltrials_client:
-                        
-                        current_orchestrator = create_orchestrator_agent(
-                            history_mode,
-                            google_scholar_client=google_scholar_client,
-                            google_search_client=google_search_client,
-                            tavily_client=tavily_client,
-                            arxiv_client=arxiv_client,
-                            pubmed_client=pubmed_client,
-                            chembl_client=chembl_client,
-                            clinicaltrials_client=clinicaltrials_client
-                        )
-                        
-                        agent_stream = current_orchestrator.stream_async(question)
-                        async for event in agent_stream:
-                            if "data" in event:
-                                full_response += event["data"]
-                                message_placeholder.markdown(full_response)
-                elif google_search_mcp_client:
-                    with google_scholar_mcp_client as google_scholar_client, google_search_mcp_client as google_search_client, \
-                         arxiv_mcp_client as arxiv_client, pubmed_mcp_client as pubmed_client, \
-                         chembl_mcp_client as chembl_client, clinicaltrials_mcp_client as clinicaltrials_client:
-                        
-                        current_orchestrator = create_orchestrator_agent(
-                            history_mode,
-                            google_scholar_client=google_scholar_client,
-                            google_search_client=google_search_client,
-                            tavily_client=None,
-                            arxiv_client=arxiv_client,
-                            pubmed_client=pubmed_client,
-                            chembl_client=chembl_client,
-                            clinicaltrials_client=clinicaltrials_client
-                        )
-                        
-                        agent_stream = current_orchestrator.stream_async(question)
-                        async for event in agent_stream:
-                            if "data" in event:
-                                full_response += event["data"]
-                                message_placeholder.markdown(full_response)
-                elif tavily_mcp_client:
-                    with google_scholar_mcp_client as google_scholar_client, tavily_mcp_client as tavily_client, \
-                         arxiv_mcp_client as arxiv_client, pubmed_mcp_client as pubmed_client, \
-                         chembl_mcp_client as chembl_client, clinicaltrials_mcp_client as clinicaltrials_client:
-                        
-                        current_orchestrator = create_orchestrator_agent(
-                            history_mode,
-                            google_scholar_client=google_scholar_client,
-                            google_search_client=None,
-                            tavily_client=tavily_client,
-                            arxiv_client=arxiv_client,
-                            pubmed_client=pubmed_client,
-                            chembl_client=chembl_client,
-                            clinicaltrials_client=clinicaltrials_client
-                        )
-                        
-                        agent_stream = current_orchestrator.stream_async(question)
-                        async for event in agent_stream:
-                            if "data" in event:
-                                full_response += event["data"]
-                                message_placeholder.markdown(full_response)
-            else:
-                # 웹 검색 없이 실행 (Google Scholar는 항상 포함)
-                with google_scholar_mcp_client as google_scholar_client, arxiv_mcp_client as arxiv_client, pubmed_mcp_client as pubmed_client, \
-                     chembl_mcp_client as chembl_client, clinicaltrials_mcp_client as clinicaltrials_client:
-                    
-                    current_orchestrator = create_orchestrator_agent(
-                        history_mode,
-                        google_scholar_client=google_scholar_client,
-                        google_search_client=None,
-                        tavily_client=None,
-                        arxiv_client=arxiv_client,
-                        pubmed_client=pubmed_client,
-                        chembl_client=chembl_client,
-                        clinicaltrials_client=clinicaltrials_client
-                    )
-                    
-                    agent_stream = current_orchestrator.stream_async(question)
-                    async for event in agent_stream:
-                        if "data" in event:
-                            full_response += event["data"]
-                            message_placeholder.markdown(full_response)
+            await generate_answer(question, history_mode, renderer.feed, sources=sources)
+            completed = True
         except Exception as e:
+            failed = True
             logger.error(f"Error in streaming response: {e}")
-            message_placeholder.markdown("Sorry, an error occurred while generating the response.")
             logger.error(traceback.format_exc())  # Detailed error logging
 
-    asyncio.run(process_streaming_response())
+    future = streaming.run_in_background(process_streaming_response())
+    renderer.run(future)
+    full_response = renderer.text
+
+    if failed:
+        message_placeholder.markdown("Sorry, an error occurred while generating the response.")
+
+    if completed and use_cache:
+        store_cached_answer(question, full_response, sources)
 
-    return full_response
\ No newline at end of file
+    return full_response
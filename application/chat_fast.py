@@ -6,8 +6,7 @@
 """
 
 from strands import Agent, tool
-from strands.models import BedrockModel
-from botocore.config import Config
+import bedrock_router
 import logging
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -23,14 +22,15 @@ logging.basicConfig(
 logger = logging.getLogger("chat_fast")
 
 def get_fast_model():
-    """빠른 Nova Micro 모델 사용"""
-    model = BedrockModel(
-        boto_client_config=Config(
+    """빠른 Nova Micro 모델 사용 (공유 인스턴스)"""
+    model = bedrock_router.get_bedrock_model(
+        None,
+        "us.amazon.nova-micro-v1:0",
+        dict(
             read_timeout=300,
             connect_timeout=300,
             retries=dict(max_attempts=2, mode="adaptive"),
         ),
-        model_id="us.amazon.nova-micro-v1:0",
         max_tokens=2000,  # 짧은 응답
         temperature=0.3,
     )
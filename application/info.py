@@ -201,10 +201,40 @@ def get_model_info(model_name):
         models = claude_3_5_haiku_models
     elif model_name == "Nova Premier":
         models = nova_premier
+    elif model_name == "Claude 4 Sonnet":
+        models = claude_4_sonnet_models
 
     return models
 
 
+# 대략적인 비용 순서 (저렴한 모델부터), 모델 tiering에 사용
+MODEL_COST_ORDER = [
+    "Nova Micro",
+    "Nova Lite",
+    "Claude 3.5 Haiku",
+    "Nova Pro",
+    "Claude 3.0 Sonnet",
+    "Claude 3.5 Sonnet",
+    "Claude 3.7 Sonnet",
+    "Claude 4 Sonnet",
+    "Nova Premier",
+]
+
+def get_cost_rank(model_name):
+    """
+    Get relative cost rank of a model (lower is cheaper).
+    
+    Args:
+        model_name (str): Name of the model
+        
+    Returns:
+        int: Rank in MODEL_COST_ORDER (unknown models rank as most expensive)
+    """
+    if model_name in MODEL_COST_ORDER:
+        return MODEL_COST_ORDER.index(model_name)
+    return len(MODEL_COST_ORDER)
+
+
 STOP_SEQUENCE_CLAUDE = "\n\nHuman:" 
 STOP_SEQUENCE_NOVA = '"\n\n<thinking>", "\n<thinking>", " <thinking>"'
 
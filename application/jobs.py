@@ -0,0 +1,454 @@
+"""
+보고서 생성 작업 큐 (Streamlit 세션과 분리)
+- 요청은 SQLite 큐(jobs)에 저장되고, 설정 가능한 수의 worker 스레드가 처리
+- 생성 중인 텍스트는 일정 간격으로 모아 이벤트(job_events)로 기록하므로 새로고침 후에도 이어서 조회 가능
+- 사용자별 동시 실행 작업 수 제한
+- 실제 처리 함수(runner)는 주입할 수 있어 stub 모델로 테스트 가능
+
+worker는 UI/API 프로세스와 분리된 별도 프로세스에서 실행합니다 (기본).
+    python application/jobs.py --workers 8
+개발용으로 UI 프로세스 안에서 worker를 함께 실행하려면 JOB_WORKERS_IN_PROCESS=1로 설정합니다.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Callable, List, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("jobs")
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_JOBS_PER_USER = int(os.getenv("MAX_JOBS_PER_USER", "2"))
+# 명시적으로 설정한 경우에만 get_job_store()를 호출한 프로세스(UI/API)에서도 worker 실행
+JOB_WORKERS_IN_PROCESS = os.getenv("JOB_WORKERS_IN_PROCESS", "").lower() in ("1", "true", "yes")
+POLL_INTERVAL = 0.5
+# 텍스트 이벤트를 모아서 기록하는 주기 (초)와 즉시 기록할 누적 글자 수
+EVENT_FLUSH_INTERVAL = 0.5
+EVENT_FLUSH_CHARS = 2000
+HEARTBEAT_INTERVAL = 30
+# heartbeat가 이 시간(초) 이상 없는 실행 중 작업은 worker가 중단된 것으로 보고 실패 처리
+JOB_STALE_AFTER = 600
+
+FINAL_STATUSES = ("done", "failed", "cancelled")
+
+# runner(job, emit) -> 최종 텍스트. emit은 생성되는 텍스트 조각마다 호출
+Runner = Callable[[dict, Callable[[str], None]], str]
+
+class JobCancelledError(Exception):
+    """실행 중인 작업이 취소됨"""
+
+class JobStore:
+    """SQLite 기반 작업 큐와 진행 이벤트 저장소 (여러 프로세스에서 공유 가능)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, user_id TEXT NOT NULL, kind TEXT NOT NULL, question TEXT NOT NULL, "
+                "history_mode TEXT NOT NULL, status TEXT NOT NULL, worker TEXT, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL, "
+                "model_name TEXT, reasoning_mode TEXT, force_refresh INTEGER NOT NULL DEFAULT 0)"
+            )
+            # 이전 버전에서 만든 DB에는 모델 선택 컬럼이 없으므로 추가
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, definition in (("model_name", "TEXT"), ("reasoning_mode", "TEXT"),
+                                       ("force_refresh", "INTEGER NOT NULL DEFAULT 0")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, type TEXT NOT NULL, "
+                "data TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, seq)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    @staticmethod
+    def _row_to_job(cursor, row) -> dict:
+        return {column[0]: value for column, value in zip(cursor.description, row)}
+
+    def submit(self, user_id: str, question: str, kind: str = "research", history_mode: str = "Disable",
+               model_name: Optional[str] = None, reasoning_mode: Optional[str] = None,
+               force_refresh: bool = False) -> str:
+        """작업을 큐에 추가하고 작업 ID 반환
+
+        model_name/reasoning_mode는 제출한 사용자의 선택으로, 작업 실행 시 그대로 적용
+        (없으면 worker 프로세스의 기본 설정 사용)
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, user_id, kind, question, history_mode, status, created_at, "
+                "model_name, reasoning_mode, force_refresh) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, user_id, kind, question, history_mode, now, model_name, reasoning_mode, int(force_refresh)),
+            )
+            conn.execute(
+                "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, 'status', 'queued', ?)",
+                (job_id, now),
+            )
+        logger.info(f"Job queued: {job_id} ({kind}, user={user_id})")
+        return job_id
+
+    def claim_next(self, worker: str, max_per_user: int = MAX_JOBS_PER_USER) -> Optional[dict]:
+        """실행 중인 작업이 max_per_user 미만인 사용자의 가장 오래된 대기 작업을 가져옴 (프로세스 간 원자적)"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.execute(
+                    "SELECT * FROM jobs j WHERE status = 'queued' AND "
+                    "(SELECT COUNT(*) FROM jobs r WHERE r.user_id = j.user_id AND r.status = 'running') < ? "
+                    "ORDER BY created_at LIMIT 1",
+                    (max_per_user,),
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return None
+                job = self._row_to_job(cursor, row)
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (worker, now, now, job["id"]),
+                )
+                conn.execute(
+                    "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, 'status', 'running', ?)",
+                    (job["id"], now),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job.update(status="running", worker=worker)
+        return job
+
+    def append_event(self, job_id: str, event_type: str, data: str):
+        """진행 이벤트 기록 (heartbeat도 함께 갱신)"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, event_type, data, now),
+            )
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (now, job_id))
+
+    def heartbeat(self, job_ids: List[str]):
+        """실행 중인 작업이 아직 살아 있음을 기록"""
+        if not job_ids:
+            return
+        placeholders = ",".join("?" * len(job_ids))
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND id IN ({placeholders})",
+                (time.time(), *job_ids),
+            )
+
+    def events_since(self, job_id: str, after_seq: int = 0, limit: int = 500) -> List[dict]:
+        """after_seq 이후의 이벤트 목록 (재연결 시 마지막으로 받은 seq부터 이어서 조회)"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT seq, type, data, created_at FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, after_seq, limit),
+            ).fetchall()
+        return [{"seq": seq, "type": event_type, "data": data, "created_at": created_at}
+                for seq, event_type, data, created_at in rows]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            cursor = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            return self._row_to_job(cursor, row) if row else None
+
+    def status(self, job_id: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def list_jobs(self, user_id: str, limit: int = 20) -> List[dict]:
+        """사용자의 최근 작업 목록 (결과 본문 제외)"""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "SELECT id, kind, question, status, error, created_at, started_at, finished_at FROM jobs "
+                "WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit),
+            )
+            return [self._row_to_job(cursor, row) for row in cursor.fetchall()]
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """대기 중인 작업의 순서 (1부터, 대기 중이 아니면 None)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                "created_at <= (SELECT created_at FROM jobs WHERE id = ? AND status = 'queued')",
+                (job_id,),
+            ).fetchone()
+        return row[0] or None
+
+    def _finalize(self, job_id: str, status: str, result: Optional[str], error: Optional[str],
+                  from_statuses: tuple) -> bool:
+        now = time.time()
+        placeholders = ",".join("?" * len(from_statuses))
+        with closing(self._connect()) as conn:
+            updated = conn.execute(
+                f"UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                f"WHERE id = ? AND status IN ({placeholders})",
+                (status, result, error, now, job_id, *from_statuses),
+            ).rowcount
+            if updated:
+                conn.execute(
+                    "INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, 'status', ?, ?)",
+                    (job_id, status if error is None else f"{status}: {error}", now),
+                )
+        return bool(updated)
+
+    def finish(self, job_id: str, result: str) -> bool:
+        return self._finalize(job_id, "done", result, None, ("running",))
+
+    def fail(self, job_id: str, error: str) -> bool:
+        return self._finalize(job_id, "failed", None, error, ("running",))
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중이거나 실행 중인 작업 취소 (실행 중이면 다음 이벤트 기록 시점에 중단됨)"""
+        return self._finalize(job_id, "cancelled", None, None, ("queued", "running"))
+
+    def fail_stale(self, stale_after: float = JOB_STALE_AFTER) -> int:
+        """heartbeat가 끊긴 실행 중 작업을 실패 처리 (worker 프로세스가 종료된 경우)"""
+        with closing(self._connect()) as conn:
+            stale = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND heartbeat_at < ?",
+                (time.time() - stale_after,),
+            ).fetchall()]
+        failed = sum(self.fail(job_id, "worker stopped responding") for job_id in stale)
+        if failed:
+            logger.warning(f"Marked {failed} stale job(s) as failed")
+        return failed
+
+class _EventBuffer:
+    """텍스트 조각을 모아 일정 간격으로 이벤트 기록 (토큰마다 SQLite에 쓰지 않도록)"""
+
+    def __init__(self, store: JobStore, job_id: str,
+                 flush_interval: float = EVENT_FLUSH_INTERVAL, flush_chars: int = EVENT_FLUSH_CHARS):
+        self.store = store
+        self.job_id = job_id
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def emit(self, text: str):
+        with self._lock:
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            if (self._pending_chars >= self.flush_chars
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.store.append_event(self.job_id, "text", "".join(self._pending))
+            self._pending = []
+            self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        if self.store.status(self.job_id) == "cancelled":
+            raise JobCancelledError(self.job_id)
+
+def run_report(job: dict, emit: Callable[[str], None]) -> str:
+    """기본 runner: 작업 종류에 따라 멀티 에이전트 또는 빠른 보고서 생성"""
+    if job["kind"] == "fast":
+        import chat_fast
+        report = chat_fast.run_fast_report(job["question"])
+        emit(report)
+        return report
+
+    import chat
+    # 다른 작업이나 UI의 선택과 섞이지 않도록 제출 시 저장한 모델 설정을 이 작업에만 적용
+    with chat.use_model(job.get("model_name"), job.get("reasoning_mode")):
+        # 포그라운드 실행과 같이 답변 캐시를 먼저 확인하고, 새로 생성한 답변은 저장
+        hit = chat.lookup_cached_answer(job["question"], bool(job.get("force_refresh")))
+        if hit is not None:
+            emit(hit["answer"])
+            return hit["answer"]
+        # worker 스레드마다 별도 event loop에서 실행 (MCP 클라이언트도 작업마다 새로 연결)
+        # 대화 기록(chat.conversation_manager)은 프로세스 전체가 공유하므로 동시에 실행되는 작업끼리
+        # 섞이지 않도록 history 없이 실행 (API 서버와 동일)
+        sources = []
+        answer = asyncio.run(chat.generate_answer(job["question"], "Disable", emit, sources=sources))
+        chat.store_cached_answer(job["question"], answer, sources)
+        return answer
+
+def stub_runner(job: dict, emit: Callable[[str], None]) -> str:
+    """Bedrock/MCP 없이 큐와 worker를 확인하기 위한 stub 모델 (질문을 단어 단위로 되돌려 줌)"""
+    delay = float(os.getenv("JOB_STUB_DELAY", "0.05"))
+    words = []
+    for word in f"Stub report for: {job['question']}".split():
+        time.sleep(delay)
+        words.append(word)
+        emit(word + " ")
+    return " ".join(words) + " "
+
+class JobWorkerPool:
+    """큐에서 작업을 가져와 처리하는 worker 스레드 묶음"""
+
+    def __init__(self, store: JobStore, runner: Runner = run_report, workers: int = JOB_WORKERS,
+                 max_per_user: int = MAX_JOBS_PER_USER, poll_interval: float = POLL_INTERVAL):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._name = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}-{os.getpid()}"
+
+    def start(self):
+        self.store.fail_stale()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(f"{self._name}-{index}",),
+                                      name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True).start()
+        logger.info(f"Started {self.workers} job worker(s), max {self.max_per_user} running job(s) per user")
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """새 작업을 가져오지 않도록 하고 실행 중인 작업이 끝날 때까지 대기"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _heartbeat(self):
+        # 텍스트 없이 도구만 오래 호출하는 작업도 중단된 것으로 보이지 않도록 주기적으로 갱신
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            with self._running_lock:
+                running = list(self._running)
+            try:
+                self.store.heartbeat(running)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Job heartbeat failed: {e}")
+
+    def _work(self, worker: str):
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim_next(worker, self.max_per_user)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Job queue busy: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self._process(job)
+
+    def _process(self, job: dict):
+        job_id = job["id"]
+        logger.info(f"Job started: {job_id}")
+        buffer = _EventBuffer(self.store, job_id)
+        with self._running_lock:
+            self._running.add(job_id)
+        try:
+            result = self.runner(job, buffer.emit)
+            buffer.flush()
+            self.store.finish(job_id, result)
+            logger.info(f"Job done: {job_id}")
+        except JobCancelledError:
+            logger.info(f"Job cancelled: {job_id}")
+        except Exception as e:
+            logger.error(f"Job failed: {job_id}: {e}")
+            try:
+                buffer.flush()
+            except Exception:
+                pass
+            self.store.fail(job_id, str(e))
+        finally:
+            with self._running_lock:
+                self._running.discard(job_id)
+
+async def follow_job(store: JobStore, job_id: str, on_text: Callable[[str], None],
+                     after_seq: int = 0, poll_interval: float = POLL_INTERVAL) -> Optional[dict]:
+    """작업이 끝날 때까지 텍스트 이벤트를 on_text로 전달하고 최종 작업 정보를 반환
+
+    after_seq=0이면 처음부터 다시 전달하므로 새로고침 후에도 전체 답변을 복원할 수 있습니다.
+    """
+    while True:
+        events = await asyncio.to_thread(store.events_since, job_id, after_seq)
+        for event in events:
+            after_seq = event["seq"]
+            if event["type"] == "text":
+                on_text(event["data"])
+        if not events:
+            job = await asyncio.to_thread(store.get, job_id)
+            if job is None or job["status"] in FINAL_STATUSES:
+                # 상태 확인 직전에 기록된 마지막 이벤트까지 전달
+                for event in await asyncio.to_thread(store.events_since, job_id, after_seq):
+                    if event["type"] == "text":
+                        on_text(event["data"])
+                return job
+            await asyncio.sleep(poll_interval)
+
+_store: Optional[JobStore] = None
+_pool: Optional[JobWorkerPool] = None
+_service_lock = threading.Lock()
+
+def get_job_store() -> JobStore:
+    """프로세스에서 공유하는 작업 저장소 (JOB_WORKERS_IN_PROCESS=1일 때만 worker도 함께 시작)"""
+    global _store, _pool
+    with _service_lock:
+        if _store is None:
+            _store = JobStore(JOB_DB_PATH)
+        if _pool is None and JOB_WORKERS_IN_PROCESS:
+            _pool = JobWorkerPool(_store).start()
+        return _store
+
+def main():
+    parser = argparse.ArgumentParser(description="Report generation job workers")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    parser.add_argument("--max-per-user", type=int, default=MAX_JOBS_PER_USER)
+    parser.add_argument("--db", default=JOB_DB_PATH)
+    parser.add_argument("--stub", action="store_true", help="use the stub model instead of Bedrock")
+    args = parser.parse_args()
+
+    store = JobStore(args.db)
+    pool = JobWorkerPool(store, runner=stub_runner if args.stub else run_report,
+                         workers=args.workers, max_per_user=args.max_per_user).start()
+    try:
+        while True:
+            time.sleep(60)
+            store.fail_stale()
+    except KeyboardInterrupt:
+        logger.info("Stopping job workers")
+        pool.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
-import subprocess  # nosec B404
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
 import sys
 import time
-import signal
-import os
-import shlex
+
+import mcp_transport
+import metrics
 
 # List of allowed MCP servers only
 ALLOWED_MCP_SERVERS = [
+    "application/mcp_server_google_scholar.py",
+    "application/mcp_server_google_search.py",
     "application/mcp_server_tavily.py",
     "application/mcp_server_arxiv.py",
     "application/mcp_server_pubmed.py",
@@ -14,111 +21,242 @@ ALLOWED_MCP_SERVERS = [
     "application/mcp_server_clinicaltrial.py",
 ]
 
-processes = []
+# Servers that need API keys are skipped by default when the keys are missing (.env is loaded by mcp_transport)
+REQUIRED_KEYS = {
+    "application/mcp_server_google_search.py": ["GOOGLE_API_KEY", "GOOGLE_CSE_ID"],
+    "application/mcp_server_tavily.py": ["TAVILY_API_KEY"],
+}
+
+RESTART_BACKOFF_INITIAL = float(os.getenv("LAUNCHER_BACKOFF_INITIAL", "1.0"))
+RESTART_BACKOFF_MAX = float(os.getenv("LAUNCHER_BACKOFF_MAX", "60.0"))
+STABLE_AFTER = float(os.getenv("LAUNCHER_STABLE_AFTER", "60.0"))  # uptime that resets the backoff
+READY_TIMEOUT = float(os.getenv("LAUNCHER_READY_TIMEOUT", "30.0"))
+STOP_TIMEOUT = 10.0
+PROBE_INTERVAL = 0.2
+LINE_LIMIT = 1024 * 1024
+PROBE_ID = "launcher-probe"
+PROTOCOL_VERSION = "2024-11-05"
 
 def validate_server_path(server_path):
     """Server path validation - prevents CWE-78"""
     # 1. Check if in allowed server list
     if server_path not in ALLOWED_MCP_SERVERS:
         raise ValueError(f"Unauthorized server: {server_path}")
-    
+
     # 2. Check if file actually exists
     normalized_path = os.path.realpath(server_path)
     if not os.path.exists(normalized_path):
         raise ValueError(f"Server file does not exist: {normalized_path}")
-    
+
     # 3. Check if it's a Python file
     if not normalized_path.endswith('.py'):
         raise ValueError(f"Not a Python file: {normalized_path}")
-    
+
     # 4. Check if it's under current directory (prevent directory traversal)
     current_dir = os.path.realpath(os.getcwd())
     if not normalized_path.startswith(current_dir):
         raise ValueError(f"Unauthorized path: {normalized_path}")
-    
+
     return normalized_path
 
-def signal_handler(sig, frame):
-    print("\nCtrl+C detected. Terminating all servers...")
-    for process in processes:
-        if process.poll() is None:  # If process is still running
-            process.terminate()
-    sys.exit(0)
+def log(label, message):
+    print(f"[{label}] {message}", flush=True)
+
+class ManagedServer:
+    """One replica of an MCP server: keeps it running, restarts it with backoff and probes readiness"""
+
+    def __init__(self, server, path, replica, replicas, transport):
+        self.server = server
+        self.path = path
+        self.transport = transport
+        self.port = None if transport == "stdio" else mcp_transport.port(server, replica - 1)
+        self.label = server if replicas == 1 else f"{server}#{replica}"
+        self.process = None
+        self.ready = asyncio.Event()
+        self.restarts = 0
+        self._probe_answered = asyncio.Event()
+
+    async def _spawn(self):
+        # Argument list with shell=False semantics; the path was validated against the allow list
+        args = [self.path]
+        if self.transport != "stdio":
+            args += ["--transport", self.transport, "--host", mcp_transport.MCP_HOST, "--port", str(self.port)]
+        return await asyncio.create_subprocess_exec(
+            sys.executable, *args,
+            # stdio servers exit on EOF, so keep their stdin open for the probe and never close it
+            stdin=asyncio.subprocess.PIPE if self.transport == "stdio" else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=LINE_LIMIT,
+        )
+
+    async def _pump(self, stream, is_stdout):
+        """Forward one pipe line by line; a stdout line answering the probe marks the server ready"""
+        suffix = "" if is_stdout else " ERROR"
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                log(self.label + suffix, f"<line longer than {LINE_LIMIT} bytes dropped>")
+                continue
+            if not line:
+                return
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if is_stdout and PROBE_ID in text and self._is_probe_response(text):
+                self._probe_answered.set()
+                continue
+            log(self.label + suffix, text)
+
+    @staticmethod
+    def _is_probe_response(text):
+        try:
+            message = json.loads(text)
+        except json.JSONDecodeError:
+            return False
+        return isinstance(message, dict) and message.get("id") == PROBE_ID
+
+    async def _send(self, message):
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        await self.process.stdin.drain()
+
+    async def _probe(self):
+        """Readiness probe: the HTTP port accepts connections, or an MCP initialize handshake over stdio"""
+        if self.transport != "stdio":
+            while True:
+                try:
+                    _, writer = await asyncio.open_connection(mcp_transport.MCP_HOST, self.port)
+                except OSError:
+                    await asyncio.sleep(PROBE_INTERVAL)
+                    continue
+                writer.close()
+                return
 
-signal.signal(signal.SIGINT, signal_handler)
+        await self._send({
+            "jsonrpc": "2.0", "id": PROBE_ID, "method": "initialize",
+            "params": {"protocolVersion": PROTOCOL_VERSION, "capabilities": {},
+                       "clientInfo": {"name": "launcher", "version": "1.0"}},
+        })
+        await self._probe_answered.wait()
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def _run_once(self, stop):
+        """Start the process and wait until it exits (or stop is requested); returns the uptime"""
+        self.ready.clear()
+        self._probe_answered.clear()
+        self.process = await self._spawn()
+        started = time.monotonic()
+        log(self.label, f"started (pid {self.process.pid})")
+
+        pumps = [asyncio.create_task(self._pump(self.process.stdout, True)),
+                 asyncio.create_task(self._pump(self.process.stderr, False))]
+        exited = asyncio.create_task(self.process.wait())
+        stopping = asyncio.create_task(stop.wait())
+        try:
+            probe = asyncio.create_task(asyncio.wait_for(self._probe(), READY_TIMEOUT))
+            await asyncio.wait([probe, exited, stopping], return_when=asyncio.FIRST_COMPLETED)
+            if probe.done() and not probe.cancelled() and probe.exception() is None:
+                self.ready.set()
+                where = "" if self.port is None else f" on port {self.port}"
+                log(self.label, f"ready{where} in {time.monotonic() - started:.2f}s")
+            elif not exited.done() and not stopping.done():
+                log(self.label, f"not ready after {READY_TIMEOUT:.0f}s, restarting")
+                await self.terminate()
+            probe.cancel()
+
+            await asyncio.wait([exited, stopping], return_when=asyncio.FIRST_COMPLETED)
+            if stopping.done():
+                await self.terminate()
+        finally:
+            stopping.cancel()
+            await exited
+            await asyncio.gather(*pumps, return_exceptions=True)
+            self.ready.clear()
+            metrics.mark_process_dead(self.process.pid)
+        return time.monotonic() - started
+
+    async def run(self, stop):
+        failures = 0
+        while not stop.is_set():
+            uptime = await self._run_once(stop)
+            if stop.is_set():
+                break
+            failures = 0 if uptime >= STABLE_AFTER else failures + 1
+            delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_INITIAL * 2 ** max(failures - 1, 0))
+            delay *= random.uniform(0.8, 1.2)
+            self.restarts += 1
+            log(self.label, f"exited with code {self.process.returncode} after {uptime:.1f}s, "
+                            f"restart #{self.restarts} in {delay:.1f}s")
+            try:
+                await asyncio.wait_for(stop.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def terminate(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        self.process.terminate()
+        try:
+            await asyncio.wait_for(self.process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            log(self.label, f"did not stop within {STOP_TIMEOUT:.0f}s, killing")
+            self.process.kill()
+            await self.process.wait()
+
+async def supervise(servers, replicas, transport):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    managed = [ManagedServer(server, path, replica, replicas, transport)
+               for server, path in servers for replica in range(1, replicas + 1)]
+    runners = [asyncio.create_task(server.run(stop)) for server in managed]
+
+    async def announce_ready():
+        await asyncio.gather(*(server.ready.wait() for server in managed))
+        log("launcher", f"All MCP servers ready ({len(managed)} processes).")
+
+    announcer = asyncio.create_task(announce_ready())
+    await stop.wait()
+    print("\nShutdown requested. Terminating all servers...", flush=True)
+    announcer.cancel()
+    await asyncio.gather(*runners, return_exceptions=True)
 
 def main():
-    print("Starting all MCP servers...")
-    
-    for server in ALLOWED_MCP_SERVERS:
+    parser = argparse.ArgumentParser(description="Run and supervise the MCP servers")
+    parser.add_argument("--servers", nargs="*", default=None,
+                        help="server scripts to run (default: all allowed servers with their API keys set)")
+    parser.add_argument("--transport", choices=mcp_transport.TRANSPORTS, default=mcp_transport.MCP_TRANSPORT,
+                        help="stdio, or a shared HTTP transport that chat.py connects to (default: MCP_TRANSPORT)")
+    parser.add_argument("--replicas", type=int, default=mcp_transport.MCP_REPLICAS,
+                        help="processes per server; HTTP replica i listens on the server port + i (default: MCP_REPLICAS)")
+    args = parser.parse_args()
+
+    if args.servers is None:
+        args.servers = []
+        for server in ALLOWED_MCP_SERVERS:
+            missing = [key for key in REQUIRED_KEYS.get(server, []) if not os.getenv(key)]
+            if missing:
+                print(f"Skipping {server}: {', '.join(missing)} not set")
+            else:
+                args.servers.append(server)
+
+    servers = []
+    for server in args.servers:
         try:
             # Path validation (prevents CWE-78)
-            normalized_path = validate_server_path(server)
-            print(f"Starting {server}...")
-            
-            # Use validated path with shlex.quote() - recommended by scanner
-            process = subprocess.Popen(  # nosec B603
-                [sys.executable, shlex.quote(server)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                shell=False,
-            )
-            processes.append(process)
-            
+            servers.append((mcp_transport.server_name(server), validate_server_path(server)))
         except ValueError as e:
             print(f"Server validation failed: {e}")
-            # Clean up already started processes
-            for p in processes:
-                if p.poll() is None:
-                    p.terminate()
             sys.exit(1)
-        
-        # Check initial log output
-        if process.poll() is not None:
-            # Process already terminated
-            stdout, stderr = process.communicate()
-            print(f"Error: Failed to start {server}")
-            print(f"STDERR: {stderr}")
-            print(f"STDOUT: {stdout}")
-            # Terminate all other processes
-            for p in processes:
-                if p != process and p.poll() is None:
-                    p.terminate()
-            sys.exit(1)
-    
-    print("\nAll MCP servers started successfully.")
-    print("Server logs:")
-    
-    # Monitor all server logs in real-time
-    try:
-        while True:
-            for i, process in enumerate(processes):
-                if process.poll() is not None:
-                    # Process terminated unexpectedly
-                    stdout, stderr = process.communicate()
-                    print(f"\nError: {ALLOWED_MCP_SERVERS[i]} server terminated unexpectedly.")
-                    print(f"STDERR: {stderr}")
-                    # Terminate all other processes
-                    for p in processes:
-                        if p != process and p.poll() is None:
-                            p.terminate()
-                    sys.exit(1)
-                
-                # Read stdout and stderr
-                for line in iter(process.stdout.readline, ""):
-                    if not line:
-                        break
-                    print(f"[{ALLOWED_MCP_SERVERS[i]}] {line.strip()}")
-                
-                for line in iter(process.stderr.readline, ""):
-                    if not line:
-                        break
-                    print(f"[{ALLOWED_MCP_SERVERS[i]} ERROR] {line.strip()}")
-                    
-    except KeyboardInterrupt:
-        signal_handler(signal.SIGINT, None)
+
+    # Remove metric files left over by processes that are gone; live processes sharing the dir keep theirs
+    metrics.clear_dead()
+    print("Starting all MCP servers...")
+    replicas = min(max(1, args.replicas), mcp_transport.MAX_REPLICAS)
+    if args.transport != "stdio" and replicas != mcp_transport.MCP_REPLICAS:
+        print(f"Note: set MCP_REPLICAS={replicas} for clients so they spread over all replicas")
+    asyncio.run(supervise(servers, replicas, args.transport))
 
 if __name__ == "__main__":
     main()
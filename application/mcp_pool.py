@@ -0,0 +1,88 @@
+"""
+MCP 클라이언트 세트 풀
+- 요청마다 MCP 서버 프로세스를 새로 띄우지 않고, 연결된 클라이언트 세트를 재사용
+- 한 세트는 한 번에 한 요청만 사용 (stdio 세션을 요청 간에 공유하지 않음)
+- 요청 중 오류가 난 세트는 닫고 다음 요청에서 새로 연결
+"""
+
+import logging
+import queue
+import sys
+import threading
+from typing import Callable, Dict, Optional
+
+import metrics
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("mcp_pool")
+
+class MCPClientPool:
+    """factory가 만드는 MCP 클라이언트 세트(dict)를 최대 size개까지 유지하며 빌려줌"""
+
+    def __init__(self, factory: Callable[[], Dict[str, object]], size: int):
+        self.factory = factory
+        self.size = size
+        self._idle: "queue.LifoQueue[Dict[str, object]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _start(self) -> Dict[str, object]:
+        clients = self.factory()
+        started = {}
+        try:
+            for name, client in clients.items():
+                client.__enter__()
+                started[name] = client
+        except Exception:
+            self._stop(started)
+            raise
+        logger.info(f"Started MCP client set: {', '.join(started)}")
+        return started
+
+    @staticmethod
+    def _stop(clients: Dict[str, object]):
+        for name, client in clients.items():
+            try:
+                client.__exit__(None, None, None)
+            except Exception as e:
+                logger.warning(f"Failed to stop MCP client {name}: {e}")
+
+    def checkout(self, timeout: Optional[float] = None) -> Dict[str, object]:
+        """연결된 클라이언트 세트를 빌림 (모든 세트가 사용 중이면 timeout까지 대기)"""
+        if self._closed:
+            raise RuntimeError("MCP client pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No MCP client set available")
+        try:
+            clients = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                clients = self._start()
+            except Exception:
+                self._slots.release()
+                raise
+        metrics.record_pool_usage(1)
+        return clients
+
+    def checkin(self, clients: Dict[str, object], healthy: bool = True):
+        """빌린 세트를 반환 (healthy=False이면 닫고 버림)"""
+        if healthy and not self._closed:
+            self._idle.put(clients)
+        else:
+            self._stop(clients)
+        metrics.record_pool_usage(-1)
+        self._slots.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._stop(self._idle.get_nowait())
+            except queue.Empty:
+                break
@@ -1,10 +1,30 @@
 from mcp.server.fastmcp import FastMCP
-import arxiv
+import mcp_transport
+import tracing
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
+import importlib.util
+import json
 import logging
+import os
+import re
 import sys
-from typing import Dict, Any, List
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from datetime import datetime, timezone
-from dateutil import parser
+
+# arxiv, dateutil, requests, pypdf and metrics are imported where they are used so the
+# server starts (and answers list_tools) without paying for them
+if TYPE_CHECKING:
+    import arxiv
+
+PYPDF_AVAILABLE = importlib.util.find_spec("pypdf") is not None
 
 # Logging configuration
 logging.basicConfig(
@@ -19,16 +39,175 @@ logger = logging.getLogger("arxiv_mcp")
 # Maximum number of results setting
 MAX_RESULTS = 10
 
+# Shared arXiv client settings (arXiv asks for at most one request every 3 seconds)
+ARXIV_PAGE_SIZE = 50
+ARXIV_DELAY_SECONDS = 3.0
+ARXIV_NUM_RETRIES = 3
+ARXIV_MAX_WORKERS = 4
+
+# Upper bound on results scanned when paging through a date-filtered search
+MAX_SCAN_RESULTS = 200
+ARXIV_EPOCH = "199101010000"
+
+# arXiv accepts up to 100 IDs per id_list query
+ID_LIST_CHUNK_SIZE = 100
+MAX_BATCH_IDS = 500
+
+# Number of papers kept in the in-memory metadata cache
+PAPER_CACHE_SIZE = 1024
+
+# Full-text cache: PDFs are stored by SHA-256 of their content
+FULLTEXT_CACHE_DIR = os.getenv("ARXIV_CACHE_DIR", "cache/arxiv")
+FULLTEXT_CHUNK_CHARS = 4000
+MAX_CHUNKS_PER_CALL = 5
+PDF_EXTRACT_WORKERS = 2
+
 # FastMCP initialization
 try:
     mcp = FastMCP(
         name="arxiv_tools",
     )
+    tracing.instrument_mcp(mcp)
     logger.info("arXiv MCP server initialized successfully")
 except Exception as e:
     err_msg = f"Error: {str(e)}"
     logger.error(f"{err_msg}")
 
+if not PYPDF_AVAILABLE:
+    logger.warning("pypdf library not found. Full-text reading is disabled. Install with: pip install pypdf")
+
+_client = None
+_client_lock = threading.Lock()
+
+def _get_client() -> "arxiv.Client":
+    """Return the shared arxiv client, creating it on first use.
+
+    One client (one HTTP session) serves the whole server; use it through _shared_results().
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            import arxiv
+
+            _client = arxiv.Client(
+                page_size=ARXIV_PAGE_SIZE,
+                delay_seconds=ARXIV_DELAY_SECONDS,
+                num_retries=ARXIV_NUM_RETRIES,
+            )
+    return _client
+
+# Searches are serialized and spaced ARXIV_DELAY_SECONDS apart across all tools and worker threads
+_request_lock = threading.Lock()
+_last_request_at = 0.0
+
+@contextlib.contextmanager
+def _shared_results(search: "arxiv.Search"):
+    """Iterate Client.results() while holding the shared request lock.
+
+    Only the public results() API is used. Pages are fetched lazily, so callers that stop
+    early do not request further pages.
+    """
+    global _last_request_at
+    with _request_lock:
+        wait = _last_request_at + ARXIV_DELAY_SECONDS - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            yield _get_client().results(search)
+        finally:
+            _last_request_at = time.monotonic()
+
+# Blocking arxiv calls run here so the MCP event loop stays responsive
+_executor = ThreadPoolExecutor(max_workers=ARXIV_MAX_WORKERS, thread_name_prefix="arxiv")
+
+async def _run_blocking(func, *args, **kwargs):
+    """Run a blocking arxiv call in the shared thread pool."""
+    loop = asyncio.get_running_loop()
+    # Carry the tool handler's trace context into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, func, *args, **kwargs))
+
+# ID-keyed LRU of arxiv.Result objects, filled by every query
+_paper_cache: "OrderedDict[str, arxiv.Result]" = OrderedDict()
+_paper_cache_lock = threading.Lock()
+
+def _strip_version(paper_id: str) -> str:
+    """Drop the version suffix from an arXiv ID (2101.00001v2 -> 2101.00001)."""
+    return re.sub(r"v\d+$", "", paper_id.strip())
+
+def _cache_get(paper_id: str) -> Optional["arxiv.Result"]:
+    """Look up a paper by versioned or unversioned ID."""
+    paper_id = paper_id.strip()
+    with _paper_cache_lock:
+        paper = _paper_cache.get(paper_id)
+        if paper is not None:
+            _paper_cache.move_to_end(paper_id)
+    tracing.increment("cache_hits" if paper is not None else "cache_misses")
+    import metrics
+    metrics.record_cache("arxiv_papers", paper is not None)
+    return paper
+
+def _cache_put(paper: "arxiv.Result"):
+    """Store a paper under both its versioned and unversioned ID."""
+    short_id = paper.get_short_id()
+    with _paper_cache_lock:
+        for key in {short_id, _strip_version(short_id)}:
+            _paper_cache[key] = paper
+            _paper_cache.move_to_end(key)
+        while len(_paper_cache) > PAPER_CACHE_SIZE:
+            _paper_cache.popitem(last=False)
+
+def _fetch_results(search: "arxiv.Search", limit: int | None = None) -> List["arxiv.Result"]:
+    """Materialize search results with the shared client."""
+    results = []
+    with _shared_results(search) as papers:
+        for paper in papers:
+            _cache_put(paper)
+            results.append(paper)
+            if limit is not None and len(results) >= limit:
+                break
+    return results
+
+def _fetch_by_ids(paper_ids: List[str]) -> Dict[str, "arxiv.Result"]:
+    """Fetch papers by ID, serving cached entries and batching the rest.
+
+    Missing IDs are requested with one id_list query per chunk of
+    ID_LIST_CHUNK_SIZE. IDs that arXiv does not know are left out of the result.
+    """
+    found = {}
+    missing = []
+    for paper_id in dict.fromkeys(pid.strip() for pid in paper_ids if pid and pid.strip()):
+        paper = _cache_get(paper_id)
+        if paper is not None:
+            found[paper_id] = paper
+        else:
+            missing.append(paper_id)
+
+    if missing:
+        logger.info(f"Fetching {len(missing)} papers by ID ({len(found)} cached)")
+
+    import arxiv
+
+    for start in range(0, len(missing), ID_LIST_CHUNK_SIZE):
+        chunk = missing[start:start + ID_LIST_CHUNK_SIZE]
+        search = arxiv.Search(id_list=chunk, max_results=len(chunk))
+        # Match the fetched papers directly so each ID is counted once in the cache metrics
+        fetched = {}
+        for paper in _fetch_results(search):
+            short_id = paper.get_short_id()
+            fetched[short_id] = fetched[_strip_version(short_id)] = paper
+        for paper_id in chunk:
+            if paper_id in fetched:
+                found[paper_id] = fetched[paper_id]
+
+    return found
+
+def _submitted_date_filter(start: datetime | None, end: datetime | None) -> str:
+    """Build an arXiv submittedDate range clause (times in UTC, YYYYMMDDHHMM)."""
+    start_str = start.strftime("%Y%m%d%H%M") if start else ARXIV_EPOCH
+    end_str = (end or datetime.now(timezone.utc)).strftime("%Y%m%d%H%M")
+    return f"submittedDate:[{start_str} TO {end_str}]"
+
 def _is_within_date_range(
     date: datetime, start: datetime | None, end: datetime | None
 ) -> bool:
@@ -44,7 +223,7 @@ def _is_within_date_range(
         return False
     return True
 
-def _process_paper(paper: arxiv.Result) -> Dict[str, Any]:
+def _process_paper(paper: "arxiv.Result") -> Dict[str, Any]:
     """Process paper information with resource URI."""
     return {
         "id": paper.get_short_id(),
@@ -57,6 +236,155 @@ def _process_paper(paper: arxiv.Result) -> Dict[str, Any]:
         "resource_uri": f"arxiv://{paper.get_short_id()}",
     }
 
+# Section headings recognized when splitting full text: a known section name on a line of its own
+# (optionally numbered, e.g. "2. Related Work", "IV RESULTS AND DISCUSSION"), or a numbered title of
+# two or more words such as "3.2 Data Collection". Table rows and figure captions ("3 SD 0.4",
+# "12 NA", "Table 2 Baseline") do not match.
+SECTION_NAMES = (
+    r"abstract|introduction|background|related work|preliminaries|"
+    r"materials and methods|methods?|methodology|approach|experiments?|"
+    r"experimental setup|results|evaluation|discussion|"
+    r"conclusions?|limitations|acknowledge?ments?|references|bibliography|"
+    r"appendix|supplementary(?: materials?)?"
+)
+SECTION_HEADING = re.compile(
+    r"^(?:(?:\d{1,2}|[IVX]{1,4})(?:\.\d{1,2})*\.?\s+)?"
+    rf"(?:{SECTION_NAMES})(?:\s+(?:and|&)\s+[a-z]+(?:\s+[a-z]+){{0,2}})?\s*:?$",
+    re.IGNORECASE,
+)
+NUMBERED_HEADING = re.compile(
+    r"^\d{1,2}(?:\.\d{1,2}){0,3}\.?\s+(?!(?:Table|Tab|Figure|Fig)\b)"
+    r"[A-Z][a-z][A-Za-z\-]*(?:\s+[A-Za-z][A-Za-z\-]*){1,6}$"
+)
+
+def _is_section_heading(line: str) -> bool:
+    return len(line) < 60 and bool(SECTION_HEADING.match(line) or NUMBERED_HEADING.match(line))
+
+def _extract_pdf_chunks(pdf_path: str, chunk_chars: int) -> List[Dict[str, Any]]:
+    """Extract text from a PDF and split it into section-labelled chunks.
+
+    Runs in a worker process, so it only uses its arguments and module-level code.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(pdf_path)
+    sections = [{"section": "Front matter", "lines": []}]
+    for page in reader.pages:
+        for line in (page.extract_text() or "").splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if _is_section_heading(stripped):
+                sections.append({"section": stripped, "lines": []})
+            else:
+                sections[-1]["lines"].append(stripped)
+
+    chunks = []
+    for section in sections:
+        text = " ".join(section["lines"])
+        for start in range(0, len(text), chunk_chars):
+            chunks.append({
+                "index": len(chunks),
+                "section": section["section"],
+                "text": text[start:start + chunk_chars],
+            })
+    return chunks
+
+_pdf_executor = None
+_fulltext_index_lock = threading.Lock()
+# paper_id -> [lock, number of callers using it]; removed when the last caller finishes
+_fulltext_locks: Dict[str, list] = {}
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    """Create the PDF extraction process pool on first use."""
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _pdf_executor
+
+def _fulltext_index_path() -> str:
+    return os.path.join(FULLTEXT_CACHE_DIR, "index.json")
+
+def _load_fulltext_index() -> Dict[str, str]:
+    """Load the paper ID -> content hash index."""
+    try:
+        with open(_fulltext_index_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _record_fulltext_hash(paper_id: str, digest: str):
+    """Add a paper to the index, writing it atomically."""
+    with _fulltext_index_lock:
+        index = _load_fulltext_index()
+        index[paper_id] = digest
+        tmp_path = _fulltext_index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, _fulltext_index_path())
+
+def _download_pdf(paper: "arxiv.Result") -> str:
+    """Stream a paper's PDF into the content-addressed cache and return its hash."""
+    import requests
+
+    os.makedirs(FULLTEXT_CACHE_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(FULLTEXT_CACHE_DIR, f"{paper.get_short_id().replace('/', '_')}.part")
+    with requests.get(paper.pdf_url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with open(tmp_path, "wb") as f:
+            for block in response.iter_content(chunk_size=64 * 1024):
+                digest.update(block)
+                f.write(block)
+    sha = digest.hexdigest()
+    os.replace(tmp_path, os.path.join(FULLTEXT_CACHE_DIR, f"{sha}.pdf"))
+    return sha
+
+def _load_chunks(sha: str) -> Optional[List[Dict[str, Any]]]:
+    """Return previously extracted chunks for a PDF hash, if any."""
+    try:
+        with open(os.path.join(FULLTEXT_CACHE_DIR, f"{sha}.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+async def _get_fulltext_chunks(paper: "arxiv.Result") -> List[Dict[str, Any]]:
+    """Download and extract a paper once, then serve it from the cache."""
+    paper_id = paper.get_short_id()
+    # Only touched from the event loop thread, so the bookkeeping needs no extra locking
+    entry = _fulltext_locks.setdefault(paper_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            return await _load_or_extract_fulltext(paper, paper_id)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _fulltext_locks[paper_id]
+
+async def _load_or_extract_fulltext(paper: "arxiv.Result", paper_id: str) -> List[Dict[str, Any]]:
+    sha = _load_fulltext_index().get(paper_id)
+    chunks = _load_chunks(sha) if sha else None
+    if chunks is not None:
+        return chunks
+
+    if not sha or not os.path.exists(os.path.join(FULLTEXT_CACHE_DIR, f"{sha}.pdf")):
+        logger.info(f"Downloading PDF for {paper_id}")
+        sha = await _run_blocking(_download_pdf, paper)
+
+    logger.info(f"Extracting full text for {paper_id}")
+    loop = asyncio.get_running_loop()
+    chunks = await loop.run_in_executor(
+        _get_pdf_executor(),
+        _extract_pdf_chunks,
+        os.path.join(FULLTEXT_CACHE_DIR, f"{sha}.pdf"),
+        FULLTEXT_CHUNK_CHARS,
+    )
+    with open(os.path.join(FULLTEXT_CACHE_DIR, f"{sha}.json"), "w", encoding="utf-8") as f:
+        json.dump(chunks, f, ensure_ascii=False)
+    _record_fulltext_hash(paper_id, sha)
+    return chunks
+
 @mcp.tool()
 async def search_papers(
     query: str, 
@@ -78,35 +406,52 @@ async def search_papers(
         List of searched papers
     """
     try:
-        client = arxiv.Client()
+        import arxiv
+        from dateutil import parser
+
         max_results = min(int(max_results), MAX_RESULTS)
 
+        try:
+            date_from_obj = parser.parse(date_from).replace(tzinfo=timezone.utc) if date_from else None
+            date_to_obj = parser.parse(date_to).replace(tzinfo=timezone.utc) if date_to else None
+        except (ValueError, TypeError) as e:
+            return [{"error": f"Invalid date format - {str(e)}"}]
+
+        # A bare date as the upper bound means the whole day
+        if date_to_obj and date_to_obj.time() == datetime.min.time():
+            date_to_obj = date_to_obj.replace(hour=23, minute=59, second=59)
+
         # Build search query with category filtering
         if categories:
             category_filter = " OR ".join(f"cat:{cat}" for cat in categories)
             query = f"({query}) AND ({category_filter})"
 
+        # Let arXiv apply the date window instead of discarding results locally
+        if date_from_obj or date_to_obj:
+            query = f"({query}) AND {_submitted_date_filter(date_from_obj, date_to_obj)}"
+
+        # Without a fixed max_results the client keeps paging lazily, so pages
+        # are only requested until enough in-range results have been collected
         search = arxiv.Search(
             query=query,
-            max_results=max_results,
+            max_results=MAX_SCAN_RESULTS if (date_from_obj or date_to_obj) else max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate,
         )
 
-        # Process results with date filtering
+        # Keep the local check as a guard against edge cases in the query filter
         results = []
-        try:
-            date_from_obj = parser.parse(date_from).replace(tzinfo=timezone.utc) if date_from else None
-            date_to_obj = parser.parse(date_to).replace(tzinfo=timezone.utc) if date_to else None
-        except (ValueError, TypeError) as e:
-            return [{"error": f"Invalid date format - {str(e)}"}]
 
-        for paper in client.results(search):
-            if _is_within_date_range(paper.published, date_from_obj, date_to_obj):
-                results.append(_process_paper(paper))
+        def _collect():
+            with _shared_results(search) as papers:
+                for paper in papers:
+                    _cache_put(paper)
+                    if _is_within_date_range(paper.published, date_from_obj, date_to_obj):
+                        results.append(_process_paper(paper))
 
-            if len(results) >= max_results:
-                break
+                    if len(results) >= max_results:
+                        break
 
+        await _run_blocking(_collect)
         return results
 
     except Exception as e:
@@ -124,10 +469,9 @@ async def download_paper(paper_id: str) -> Dict[str, Any]:
         Download result information
     """
     try:
-        client = arxiv.Client()
-        search = arxiv.Search(id_list=[paper_id])
+        papers = await _run_blocking(_fetch_by_ids, [paper_id])
         
-        for paper in client.results(search):
+        for paper in papers.values():
             return {
                 "id": paper.get_short_id(),
                 "title": paper.title,
@@ -152,10 +496,9 @@ async def read_paper(paper_id: str) -> Dict[str, Any]:
         Paper content and metadata
     """
     try:
-        client = arxiv.Client()
-        search = arxiv.Search(id_list=[paper_id])
+        papers = await _run_blocking(_fetch_by_ids, [paper_id])
         
-        for paper in client.results(search):
+        for paper in papers.values():
             return {
                 "id": paper.get_short_id(),
                 "title": paper.title,
@@ -164,7 +507,7 @@ async def read_paper(paper_id: str) -> Dict[str, Any]:
                 "categories": paper.categories,
                 "published": paper.published.isoformat(),
                 "content_type": "text",
-                "content": paper.summary  # Only providing the summary here, additional work needed to get full content
+                "content": paper.summary  # Only the summary here, use read_paper_fulltext for the full content
             }
         
         return {"error": f"Paper with ID {paper_id} not found"}
@@ -172,6 +515,81 @@ async def read_paper(paper_id: str) -> Dict[str, Any]:
         logger.error(f"Read error: {str(e)}")
         return {"error": f"Read failed: {str(e)}"}
 
+@mcp.tool()
+async def read_paper_fulltext(
+    paper_id: str,
+    start_chunk: int = 0,
+    num_chunks: int = 3,
+    section: str = None
+) -> Dict[str, Any]:
+    """Read the full text of an arXiv paper in chunks.
+    
+    The PDF is downloaded and parsed once per paper; later calls are served from
+    the local cache.
+    
+    Args:
+        paper_id: arXiv paper ID
+        start_chunk: Index of the first chunk to return
+        num_chunks: Number of chunks to return (max 5)
+        section: Only return chunks whose section heading contains this text (e.g. "methods")
+        
+    Returns:
+        Requested chunks with the list of sections and total chunk count
+    """
+    if not PYPDF_AVAILABLE:
+        return {"error": "pypdf library is not installed. Install with: pip install pypdf"}
+
+    try:
+        papers = await _run_blocking(_fetch_by_ids, [paper_id])
+        if not papers:
+            return {"error": f"Paper with ID {paper_id} not found"}
+        paper = next(iter(papers.values()))
+
+        chunks = await _get_fulltext_chunks(paper)
+        selected = chunks
+        if section:
+            selected = [c for c in chunks if section.lower() in c["section"].lower()]
+
+        start_chunk = max(int(start_chunk), 0)
+        num_chunks = min(max(int(num_chunks), 1), MAX_CHUNKS_PER_CALL)
+        return {
+            "id": paper.get_short_id(),
+            "title": paper.title,
+            "sections": list(dict.fromkeys(c["section"] for c in chunks)),
+            "total_chunks": len(selected),
+            "start_chunk": start_chunk,
+            "chunks": selected[start_chunk:start_chunk + num_chunks],
+        }
+    except Exception as e:
+        logger.error(f"Full-text read error: {str(e)}")
+        return {"error": f"Full-text read failed: {str(e)}"}
+
+@mcp.tool()
+async def get_papers(paper_ids: List[str]) -> List[Dict[str, Any]]:
+    """Get metadata for several arXiv papers at once.
+    
+    Args:
+        paper_ids: List of arXiv paper IDs
+        
+    Returns:
+        List of papers in the requested order (an error entry for unknown IDs)
+    """
+    try:
+        paper_ids = [pid.strip() for pid in paper_ids if pid and pid.strip()][:MAX_BATCH_IDS]
+        papers = await _run_blocking(_fetch_by_ids, paper_ids)
+        
+        results = []
+        for paper_id in paper_ids:
+            paper = papers.get(paper_id)
+            if paper is not None:
+                results.append(_process_paper(paper))
+            else:
+                results.append({"id": paper_id, "error": f"Paper with ID {paper_id} not found"})
+        return results
+    except Exception as e:
+        logger.error(f"Batch fetch error: {str(e)}")
+        return [{"error": f"Batch fetch failed: {str(e)}"}]
+
 @mcp.tool()
 async def list_papers(category: str = None, max_results: int = 10) -> List[Dict[str, Any]]:
     """Get a list of the latest papers in a specific category.
@@ -184,7 +602,8 @@ async def list_papers(category: str = None, max_results: int = 10) -> List[Dict[
         List of papers
     """
     try:
-        client = arxiv.Client()
+        import arxiv
+
         max_results = min(int(max_results), MAX_RESULTS)
         
         query = f"cat:{category}" if category else ""
@@ -194,16 +613,11 @@ async def list_papers(category: str = None, max_results: int = 10) -> List[Dict[
             sort_by=arxiv.SortCriterion.SubmittedDate,
         )
         
-        results = []
-        for paper in client.results(search):
-            results.append(_process_paper(paper))
-            if len(results) >= max_results:
-                break
-                
-        return results
+        papers = await _run_blocking(_fetch_results, search, max_results)
+        return [_process_paper(paper) for paper in papers]
     except Exception as e:
         logger.error(f"List error: {str(e)}")
         return [{"error": f"List failed: {str(e)}"}]
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    mcp_transport.serve(mcp, "arxiv")
\ No newline at end of file
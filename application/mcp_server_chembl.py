@@ -1,8 +1,10 @@
 from mcp.server.fastmcp import FastMCP
+import mcp_transport
+import tracing
+import functools
 import logging
 import sys
 from typing import Any, List, Dict
-from chembl_webresource_client.new_client import new_client
 
 MAXIMUM_ACTIVITY = 100
 
@@ -19,6 +21,7 @@ try:
     mcp = FastMCP(
         name="chembl_tools",
     )
+    tracing.instrument_mcp(mcp)
     logger.info("ChEMBL MCP server initialized successfully")
 except Exception as e:
     err_msg = f"Error: {str(e)}"
@@ -27,6 +30,16 @@ except Exception as e:
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+@functools.lru_cache(maxsize=None)
+def _get_client():
+    """Import the ChEMBL client on first use.
+
+    chembl_webresource_client fetches the API schema while it is imported, which
+    would otherwise delay every server start.
+    """
+    from chembl_webresource_client.new_client import new_client
+    return new_client
+
 @mcp.tool()
 async def compount_activity(compound_name: str) -> List[Dict[str, Any]]:
     """activity data for the specified compound
@@ -37,7 +50,7 @@ async def compount_activity(compound_name: str) -> List[Dict[str, Any]]:
     Returns:
         List of activity data
     """
-    client = new_client
+    client = _get_client()
     molecule_id = client.molecule.filter(pref_name__iexact=compound_name).only('molecule_chembl_id')[0]
     # TODO: consider other types of activities
     activity = list(client.activity.filter(molecule_chembl_id=molecule_id['molecule_chembl_id']).filter(standard_type="IC50").only(['pchembl_value', 'assay_description', 'canonical_smiles']))
@@ -55,7 +68,7 @@ async def target_activity(target_name: str) -> List[Dict[str, Any]]:
     Returns:
         List of activity data
     """
-    client = new_client
+    client = _get_client()
     target_id = client.target.filter(target_synonym__icontains=target_name, organism='Homo sapiens').only('target_chembl_id')[0]
     # TODO: consider other types of activities
     activity = list(client.activity.filter(target_chembl_id=target_id['target_chembl_id']).filter(standard_type="IC50").only(['pchembl_value', 'assay_description', 'canonical_smiles']))
@@ -64,5 +77,5 @@ async def target_activity(target_name: str) -> List[Dict[str, Any]]:
     return activity
 
 if __name__ == "__main__":
-    mcp.run()
+    mcp_transport.serve(mcp, "chembl")
 
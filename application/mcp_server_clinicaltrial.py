@@ -1,10 +1,11 @@
 # REF: https://github.com/JackKuo666/ClinicalTrials-MCP-Server
 from mcp.server.fastmcp import FastMCP, Context
-from pytrials.client import ClinicalTrials
-import pandas as pd
+import mcp_transport
+import tracing
 import os
 import logging
 import sys
+import threading
 
 MAX_OUTPUT_CHARS = 20000
 
@@ -21,17 +22,36 @@ try:
     mcp = FastMCP(
         name="clinicaltrial_tools",
     )
+    tracing.instrument_mcp(mcp)
     logger.info("Clinical Trial MCP server initialized successfully")
 except Exception as e:
     err_msg = f"Error: {str(e)}"
     logger.error(f"{err_msg}")
 
-ct = ClinicalTrials()
+# pandas and pytrials are imported on first use: importing them (and the API
+# version request ClinicalTrials() makes) would otherwise add seconds to every cold start
+_ct = None
+_ct_lock = threading.Lock()
+
+def _get_client():
+    """Create the shared ClinicalTrials client on first use"""
+    global _ct
+    with _ct_lock:
+        if _ct is None:
+            from pytrials.client import ClinicalTrials
+            _ct = ClinicalTrials()
+    return _ct
+
+def _to_dataframe(rows):
+    """Convert a header + data row list returned by pytrials to a DataFrame"""
+    import pandas as pd
+    return pd.DataFrame.from_records(rows[1:], columns=rows[0])
 
 # Helper functions
 def load_csv_file(filename):
     """Load data from a CSV file"""
     if os.path.exists(filename):
+        import pandas as pd
         return pd.read_csv(filename)
     return None
 
@@ -109,13 +129,13 @@ def get_study_by_id(nct_id: str) -> str:
     
     # If not found in local data, try to fetch from API
     try:
-        study = ct.get_study_fields(
+        study = _get_client().get_study_fields(
             search_expr=f"NCT Number={nct_id}",
             fields=["NCT Number", "Conditions", "Study Title", "Brief Summary", "Detailed Description"],
             max_studies=1
         )
         if len(study) > 1:  # Header + data
-            return pd.DataFrame.from_records(study[1:], columns=study[0]).to_string()
+            return _to_dataframe(study).to_string()
     except Exception as e:
         return f"Error fetching study: {str(e)}"
     
@@ -144,7 +164,7 @@ def search_clinical_trials_and_save_studies_to_csv(search_expr: str, max_studies
         
         # Get study fields
         fmt = "csv" if save_csv else None
-        results = ct.get_study_fields(
+        results = _get_client().get_study_fields(
             search_expr=search_expr,
             fields=fields,
             max_studies=max_studies,
@@ -152,7 +172,7 @@ def search_clinical_trials_and_save_studies_to_csv(search_expr: str, max_studies
         )
         
         if len(results) > 1:  # Header + data
-            df = pd.DataFrame.from_records(results[1:], columns=results[0])
+            df = _to_dataframe(results)
             
             # Save to CSV if requested
             if save_csv:
@@ -178,9 +198,9 @@ def get_full_study_details(nct_id: str) -> str:
         String representation of the study details
     """
     try:
-        study = ct.get_full_studies(search_expr=f"NCT Number={nct_id}", max_studies=1)
+        study = _get_client().get_full_studies(search_expr=f"NCT Number={nct_id}", max_studies=1)
         if len(study) > 1:  # Header + data
-            df = pd.DataFrame.from_records(study[1:], columns=study[0])
+            df = _to_dataframe(study)
             return format_limited_output(df)
         return f"Study with NCT ID {nct_id} not found"
     except Exception as e:
@@ -202,14 +222,14 @@ def get_studies_by_keyword(keyword: str, max_studies: int = 20, save_csv: bool =
     """
     try:
         fields = ["NCT Number", "Conditions", "Study Title", "Brief Summary"]
-        results = ct.get_study_fields(
+        results = _get_client().get_study_fields(
             search_expr=keyword,
             fields=fields,
             max_studies=max_studies
         )
         
         if len(results) > 1:  # Header + data
-            df = pd.DataFrame.from_records(results[1:], columns=results[0])
+            df = _to_dataframe(results)
             
             # Save to CSV if requested
             if save_csv:
@@ -238,11 +258,11 @@ def get_full_studies_and_save(search_expr: str, max_studies: int = 20, filename:
     """
     try:
         # Get full studies
-        full_studies = ct.get_full_studies(search_expr=search_expr, max_studies=max_studies)
+        full_studies = _get_client().get_full_studies(search_expr=search_expr, max_studies=max_studies)
         
         if len(full_studies) > 1:  # Header + data
             # Convert to DataFrame
-            df = pd.DataFrame.from_records(full_studies[1:], columns=full_studies[0])
+            df = _to_dataframe(full_studies)
             
             # Save to CSV
             df.to_csv(filename, index=False)
@@ -323,4 +343,4 @@ def csv_management_prompt() -> str:
     """
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    mcp_transport.serve(mcp, "clinicaltrials")
\ No newline at end of file
@@ -5,14 +5,23 @@ Google Custom Search MCP Server
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional
+from zoneinfo import ZoneInfo
 from pydantic import BaseModel, Field
 import json
 import os
-import requests
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+from persistent_cache import PersistentCache, UsageLedger
+import mcp_transport
+import tracing
+
+# httpx와 metrics는 사용하는 곳에서 import (서버 시작과 list_tools 응답을 빠르게 유지)
+if TYPE_CHECKING:
+    import httpx
 
 # Configure logging
 logging.basicConfig(
@@ -34,15 +43,172 @@ GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
 if not GOOGLE_API_KEY or not GOOGLE_CSE_ID:
     logger.warning("Google Custom Search API 키 또는 CSE ID가 설정되지 않았습니다. 웹 검색이 비활성화됩니다.")
 
+# 일일 무료 quota (Google 기준 태평양 시간 자정에 초기화)
+GOOGLE_DAILY_QUOTA = int(os.getenv("GOOGLE_DAILY_QUOTA", "100"))
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Custom Search API는 요청당 최대 10개, start 기준 최대 100개까지 제공
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+PAGE_SIZE = 10
+MAX_SEARCH_RESULTS = 50
+
+# 검색 결과 캐시 (뉴스는 짧게 유지)
+GOOGLE_CACHE_PATH = os.getenv("GOOGLE_CACHE_PATH", "cache/google_search.sqlite3")
+WEB_CACHE_TTL = 24 * 3600   # 24시간
+NEWS_CACHE_TTL = 3600       # 1시간
+
+try:
+    search_cache = PersistentCache(GOOGLE_CACHE_PATH)
+    quota_ledger = UsageLedger(GOOGLE_CACHE_PATH)
+except Exception as e:
+    search_cache = None
+    quota_ledger = None
+    logger.warning(f"Google Search cache/quota ledger disabled: {e}")
+
 try:
     mcp = FastMCP(
         name="google_search_tools",
     )
+    tracing.instrument_mcp(mcp)
     logger.info("Google Search MCP server initialized successfully")
 except Exception as e:
     err_msg = f"Error: {str(e)}"
     logger.error(f"{err_msg}")
 
+def _quota_period() -> str:
+    """quota 집계 기간 (태평양 시간 기준 날짜)"""
+    return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+def _cache_key(kind: str, params: dict) -> str:
+    """API 키를 제외한 요청 파라미터로 캐시 키 생성 (쿼리는 정규화)"""
+    normalized = {k: v for k, v in params.items() if k not in ('key', 'cx') and v is not None}
+    normalized['q'] = " ".join(str(normalized.get('q', '')).lower().split())
+    raw = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return f"{kind}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+def _cache_get(key: str, allow_stale: bool = False):
+    if search_cache is None:
+        return None
+    try:
+        return search_cache.get(key, allow_stale=allow_stale)
+    except Exception as e:
+        logger.warning(f"Google Search cache read error: {e}")
+        return None
+
+def _cache_set(key: str, value: dict, ttl: float):
+    if search_cache is None:
+        return
+    try:
+        search_cache.set(key, value, ttl)
+    except Exception as e:
+        logger.warning(f"Google Search cache write error: {e}")
+
+def _consume_quota() -> bool:
+    """quota가 남아 있으면 1회 차감 (ledger를 사용할 수 없으면 항상 허용)"""
+    if quota_ledger is None:
+        return True
+    try:
+        return quota_ledger.try_consume("google_cse", _quota_period(), GOOGLE_DAILY_QUOTA)
+    except Exception as e:
+        logger.warning(f"Google Search quota ledger error: {e}")
+        return True
+
+def quota_remaining() -> Optional[int]:
+    """오늘 남은 quota (ledger를 사용할 수 없으면 None)"""
+    if quota_ledger is None:
+        return None
+    return max(0, GOOGLE_DAILY_QUOTA - quota_ledger.used("google_cse", _quota_period()))
+
+_http_client: Optional["httpx.AsyncClient"] = None
+
+def _get_http_client() -> "httpx.AsyncClient":
+    """연결을 재사용하는 공용 async HTTP 클라이언트"""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _http_client
+
+async def _fetch_page(kind: str, params: dict, ttl: float):
+    """한 페이지 검색: 캐시 확인 → quota 확인 → API 호출
+
+    Returns:
+        (결과 dict 또는 None, 상태) - 상태는 "cache", "api", "stale", "quota" 중 하나
+    """
+    import metrics
+
+    key = _cache_key(kind, params)
+    cached = _cache_get(key)
+    if cached is not None:
+        logger.info(f"Google Search cache hit ({kind}, start={params.get('start')}): {params.get('q')}")
+        return cached, "cache"
+
+    if not _consume_quota():
+        logger.warning("Google Search daily quota exhausted")
+        metrics.record_upstream_error("google_search", throttled=True)
+        stale = _cache_get(key, allow_stale=True)
+        if stale is not None:
+            return stale, "stale"
+        return None, "quota"
+
+    request_params = {k: v for k, v in params.items() if v is not None}
+    response = await _get_http_client().get(GOOGLE_SEARCH_URL, params=request_params)
+    if response.is_error:
+        metrics.record_upstream_error("google_search", throttled=response.status_code == 429)
+    response.raise_for_status()
+
+    results = response.json()
+    _cache_set(key, results, ttl)
+    return results, "api"
+
+async def _cached_search(kind: str, params: dict, num_results: int, ttl: float) -> str:
+    """첫 페이지를 가져온 뒤, 실제 결과 수(totalResults)까지 필요한 나머지 페이지만 동시에 가져와 합치기
+
+    페이지마다 quota를 1회 사용하므로 첫 페이지가 PAGE_SIZE보다 적게 돌아오면 더 요청하지 않습니다.
+    quota가 소진된 페이지는 만료된 캐시라도 사용하고, 결과가 전혀 없으면 degraded 메시지를 반환합니다.
+    """
+    import metrics
+
+    num_results = max(1, min(int(num_results), MAX_SEARCH_RESULTS))
+
+    def page(offset: int) -> dict:
+        return dict(params, num=min(PAGE_SIZE, num_results - offset), start=offset + 1)
+
+    first = await _fetch_page(kind, page(0), ttl)
+    outcomes = [first]
+    results = first[0]
+    if results and len(results.get('items', [])) >= PAGE_SIZE and num_results > PAGE_SIZE:
+        try:
+            available = int(results.get('searchInformation', {}).get('totalResults', num_results))
+        except (TypeError, ValueError):
+            available = num_results
+        limit = min(num_results, available)
+        outcomes += await asyncio.gather(*[
+            _fetch_page(kind, page(offset), ttl) for offset in range(PAGE_SIZE, limit, PAGE_SIZE)
+        ])
+
+    items = []
+    statuses = set()
+    for results, status in outcomes:
+        statuses.add(status)
+        metrics.record_cache("google_search", status in ("cache", "stale"))
+        if results is None or not results.get('items'):
+            break  # 이후 페이지는 이어지지 않음
+        items.extend(results['items'])
+
+    tracing.set_attribute("cache_status", sorted(statuses))
+
+    if not items and "quota" in statuses:
+        return f"Google Search 일일 무료 한도({GOOGLE_DAILY_QUOTA}회)가 소진되었습니다. 다른 데이터베이스를 사용하세요."
+
+    output = format_search_results({'items': items} if items else {})
+    if "stale" in statuses or "quota" in statuses:
+        output = "(일일 검색 한도 소진 - 일부 결과는 이전에 캐시된 결과입니다)\n" + output
+    return output
+
 def format_search_results(results: dict) -> str:
     """Google 검색 결과를 읽기 쉬운 형태로 포맷"""
     if 'items' not in results:
@@ -74,7 +240,7 @@ async def google_web_search(
     
     Args:
         query: 검색 쿼리
-        num_results: 결과 개수 (최대 10개)
+        num_results: 결과 개수 (최대 50개, 10개 단위로 페이지를 동시에 조회)
         language: 언어 설정 (ko=한국어, en=영어)
     
     Returns:
@@ -83,24 +249,20 @@ async def google_web_search(
     if not GOOGLE_API_KEY or not GOOGLE_CSE_ID:
         return "Google Custom Search API가 설정되지 않았습니다. 환경변수 GOOGLE_API_KEY와 GOOGLE_CSE_ID를 설정해주세요."
     
+    import httpx
+
     try:
-        # Google Custom Search API 호출
-        url = "https://www.googleapis.com/customsearch/v1"
+        # Google Custom Search API 호출 (캐시 및 quota 확인 포함)
         params = {
             'key': GOOGLE_API_KEY,
             'cx': GOOGLE_CSE_ID,
             'q': query,
-            'num': min(num_results, 10),
             'lr': f'lang_{language}' if language else None
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        results = response.json()
-        return format_search_results(results)
+        return await _cached_search("web", params, num_results, WEB_CACHE_TTL)
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error_msg = f"Google Search API 요청 오류: {str(e)}"
         logger.error(error_msg)
         return error_msg
@@ -120,7 +282,7 @@ async def google_news_search(
     
     Args:
         query: 검색 쿼리
-        num_results: 결과 개수 (최대 10개)
+        num_results: 결과 개수 (최대 50개, 10개 단위로 페이지를 동시에 조회)
         language: 언어 설정 (ko=한국어, en=영어)
     
     Returns:
@@ -133,26 +295,33 @@ async def google_news_search(
         # 뉴스 관련 검색어 추가
         news_query = f"{query} 뉴스 OR news OR 최신"
         
-        url = "https://www.googleapis.com/customsearch/v1"
         params = {
             'key': GOOGLE_API_KEY,
             'cx': GOOGLE_CSE_ID,
             'q': news_query,
-            'num': min(num_results, 10),
             'lr': f'lang_{language}' if language else None,
             'sort': 'date'  # 날짜순 정렬
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        results = response.json()
-        return format_search_results(results)
+        return await _cached_search("news", params, num_results, NEWS_CACHE_TTL)
         
     except Exception as e:
         error_msg = f"google_news_search 오류: {str(e)}"
         logger.error(error_msg)
         return error_msg
 
+@mcp.tool()
+async def google_search_quota() -> str:
+    """
+    오늘 남은 Google Custom Search 무료 quota 확인
+    
+    Returns:
+        남은 검색 횟수 안내 문자열
+    """
+    remaining = quota_remaining()
+    if remaining is None:
+        return "quota 기록을 사용할 수 없습니다."
+    return f"오늘 남은 Google 검색 횟수: {remaining}/{GOOGLE_DAILY_QUOTA}"
+
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    mcp_transport.serve(mcp, "google_search")
\ No newline at end of file
@@ -1,9 +1,14 @@
 from mcp.server.fastmcp import FastMCP
+import mcp_transport
+import tracing
 import logging
 import sys
-import requests
-import defusedxml.ElementTree as ET
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+# requests, defusedxml and metrics are imported where they are used so the
+# server starts (and answers list_tools) without paying for them
+if TYPE_CHECKING:
+    import requests
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,12 +23,24 @@ try:
     mcp = FastMCP(
         name="pubmed_tools",
     )
+    tracing.instrument_mcp(mcp)
     logger.info("PubMed MCP server initialized successfully")
 except Exception as e:
     err_msg = f"Error: {str(e)}"
     logger.error(f"{err_msg}")
 
 # Helper functions for PubMed API
+def _get(url: str, params: Dict[str, Any]) -> "requests.Response":
+    """GET an E-utilities endpoint, counting upstream errors (429 = rate limited)"""
+    import requests
+    import metrics
+
+    response = requests.get(url, params=params)
+    if not response.ok:
+        metrics.record_upstream_error("pubmed", throttled=response.status_code == 429)
+    response.raise_for_status()
+    return response
+
 def search_pubmed(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     """
     Search PubMed for articles matching the query
@@ -48,8 +65,7 @@ def search_pubmed(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
     }
     
     try:
-        search_response = requests.get(search_url, params=search_params)
-        search_response.raise_for_status()
+        search_response = _get(search_url, search_params)
         search_data = search_response.json()
         
         # Extract IDs
@@ -65,10 +81,10 @@ def search_pubmed(query: str, max_results: int = 10) -> List[Dict[str, Any]]:
             "retmode": "xml"
         }
         
-        fetch_response = requests.get(fetch_url, params=fetch_params)
-        fetch_response.raise_for_status()
+        fetch_response = _get(fetch_url, fetch_params)
         
         # Parse XML response
+        import defusedxml.ElementTree as ET
         root = ET.fromstring(fetch_response.text)
         articles = []
         
@@ -145,10 +161,10 @@ def get_pubmed_article_details(pmid: str) -> Optional[Dict[str, Any]]:
     }
     
     try:
-        fetch_response = requests.get(fetch_url, params=fetch_params)
-        fetch_response.raise_for_status()
+        fetch_response = _get(fetch_url, fetch_params)
         
         # Parse XML response
+        import defusedxml.ElementTree as ET
         root = ET.fromstring(fetch_response.text)
         article_element = root.find(".//PubmedArticle")
         
@@ -321,4 +337,4 @@ def pubmed_search_by_drug(drug_name: str, max_results: int = 10):
     return results
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    mcp_transport.serve(mcp, "pubmed")
\ No newline at end of file
@@ -1,12 +1,20 @@
 from mcp.server.fastmcp import FastMCP
+import asyncio
+import hashlib
 import logging
+import re
 import sys
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator
-from tavily import TavilyClient, InvalidAPIKeyError, UsageLimitExceededError
 import json
 import os
 from dotenv import load_dotenv
+from persistent_cache import PersistentCache
+import mcp_transport
+import tracing
+
+# tavily and metrics are imported where they are used so the server starts
+# (and answers list_tools) without paying for them
 
 # Configure logging
 logging.basicConfig(
@@ -31,13 +39,137 @@ try:
     mcp = FastMCP(
         name="tavily_tools",
     )
+    tracing.instrument_mcp(mcp)
     logger.info("Tavily MCP server initialized successfully")
 except Exception as e:
     err_msg = f"Error: {str(e)}"
     logger.error(f"{err_msg}")
 
-# Initialize Tavily client
-client = TavilyClient(api_key=api_key)
+_client = None
+
+def _get_client():
+    """Create the Tavily client on first use."""
+    global _client
+    if _client is None:
+        from tavily import TavilyClient
+        _client = TavilyClient(api_key=api_key)
+    return _client
+
+def _api_errors() -> tuple:
+    """Tavily errors that are reported to the caller instead of raised."""
+    from tavily import InvalidAPIKeyError, UsageLimitExceededError
+    return (InvalidAPIKeyError, UsageLimitExceededError)
+
+# Response cache: news goes stale quickly, general web results much slower
+TAVILY_CACHE_PATH = os.getenv("TAVILY_CACHE_PATH", "cache/tavily.sqlite3")
+TAVILY_NEWS_TTL = 3600               # 1 hour
+TAVILY_GENERAL_TTL = 7 * 24 * 3600   # 7 days
+# Also match queries that differ only in word order, case or stopwords
+TAVILY_FUZZY_CACHE = os.getenv("TAVILY_FUZZY_CACHE", "true").lower() == "true"
+
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "in", "on", "to", "and", "or", "with", "about", "by",
+    "what", "which", "who", "is", "are", "was", "were", "be", "do", "does", "how",
+    "please", "find", "show", "me", "tell",
+}
+
+try:
+    response_cache = PersistentCache(TAVILY_CACHE_PATH)
+except Exception as e:
+    response_cache = None
+    logger.warning(f"Tavily cache disabled: {e}")
+
+def _normalize_query(query: str, fuzzy: bool = False) -> str:
+    """Lowercase and collapse whitespace; fuzzy mode also drops stopwords and sorts tokens."""
+    tokens = re.findall(r"\w+", query.lower())
+    if fuzzy:
+        tokens = sorted({token for token in tokens if token not in STOPWORDS})
+    return " ".join(tokens)
+
+def _cache_keys(params: Dict[str, Any]) -> List[str]:
+    """Exact (and optionally near-duplicate) cache keys for a search request."""
+    base = {k: v for k, v in params.items() if k != "query"}
+    for field in ("include_domains", "exclude_domains"):
+        base[field] = sorted(d.lower() for d in (base.get(field) or []))
+    base.setdefault("topic", "general")
+
+    keys = []
+    for fuzzy in ([False, True] if TAVILY_FUZZY_CACHE else [False]):
+        raw = json.dumps(dict(base, query=_normalize_query(params["query"], fuzzy)), sort_keys=True, default=str)
+        keys.append(("fuzzy:" if fuzzy else "exact:") + hashlib.sha256(raw.encode("utf-8")).hexdigest())
+    return keys
+
+def _cache_lookup(keys: List[str]) -> Optional[Dict[str, Any]]:
+    if response_cache is None:
+        return None
+    for key in keys:
+        try:
+            cached = response_cache.get(key)
+        except Exception as e:
+            logger.warning(f"Tavily cache read error: {e}")
+            return None
+        if cached is not None:
+            return cached
+    return None
+
+def _cache_store(keys: List[str], response: Dict[str, Any], topic: str):
+    if response_cache is None:
+        return
+    ttl = TAVILY_NEWS_TTL if topic == "news" else TAVILY_GENERAL_TTL
+    for key in keys:
+        try:
+            response_cache.set(key, response, ttl)
+        except Exception as e:
+            logger.warning(f"Tavily cache write error: {e}")
+
+async def _fetch(params: Dict[str, Any], keys: List[str]) -> Dict[str, Any]:
+    """Call Tavily in a worker thread and cache the response."""
+    import metrics
+    from tavily import UsageLimitExceededError
+
+    try:
+        response = await asyncio.to_thread(_get_client().search, **params)
+    except UsageLimitExceededError:
+        metrics.record_upstream_error("tavily", throttled=True)
+        raise
+    except Exception:
+        metrics.record_upstream_error("tavily")
+        raise
+    _cache_store(keys, response, params.get("topic", "general"))
+    return response
+
+# In-flight searches keyed by their request parameters (single-flight)
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def _search(**kwargs) -> Dict[str, Any]:
+    """Serve a search from the cache, or run TavilyClient.search in a worker thread.
+
+    While a search is in flight, callers with the same parameters await the same
+    upstream request instead of spending another query from the quota.
+    """
+    import metrics
+
+    keys = _cache_keys(kwargs)
+    cached = _cache_lookup(keys)
+    tracing.set_attribute("cache_hit", cached is not None)
+    metrics.record_cache("tavily", cached is not None)
+    if cached is not None:
+        logger.info(f"Tavily cache hit: {kwargs.get('query')}")
+        return dict(cached)
+
+    key = keys[0]
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_fetch(kwargs, keys))
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        logger.info(f"Joining in-flight Tavily search: {kwargs.get('query')}")
+
+    # Shield so a cancelled caller does not cancel the shared request
+    response = await asyncio.shield(future)
+    # Each caller annotates its own copy
+    return dict(response)
 
 # Base model for search parameters
 class SearchBase(BaseModel):
@@ -143,7 +275,7 @@ async def tavily_web_search(
         include_domains_list = SearchBase.parse_domains_list(include_domains) if include_domains else []
         exclude_domains_list = SearchBase.parse_domains_list(exclude_domains) if exclude_domains else []
         
-        response = client.search(
+        response = await _search(
             query=query,
             max_results=max_results,
             search_depth=search_depth,
@@ -158,7 +290,7 @@ async def tavily_web_search(
             response["excluded_domains"] = exclude_domains_list
             
         return format_results(response)
-    except (InvalidAPIKeyError, UsageLimitExceededError) as e:
+    except _api_errors() as e:
         error_msg = f"Tavily API error: {str(e)}"
         logger.error(error_msg)
         return error_msg
@@ -193,7 +325,7 @@ async def tavily_answer_search(
         include_domains_list = SearchBase.parse_domains_list(include_domains) if include_domains else []
         exclude_domains_list = SearchBase.parse_domains_list(exclude_domains) if exclude_domains else []
         
-        response = client.search(
+        response = await _search(
             query=query,
             max_results=max_results,
             search_depth=search_depth,
@@ -209,7 +341,7 @@ async def tavily_answer_search(
             response["excluded_domains"] = exclude_domains_list
             
         return format_results(response)
-    except (InvalidAPIKeyError, UsageLimitExceededError) as e:
+    except _api_errors() as e:
         error_msg = f"Tavily API error: {str(e)}"
         logger.error(error_msg)
         return error_msg
@@ -243,7 +375,7 @@ async def tavily_news_search(
         include_domains_list = SearchBase.parse_domains_list(include_domains) if include_domains else []
         exclude_domains_list = SearchBase.parse_domains_list(exclude_domains) if exclude_domains else []
         
-        response = client.search(
+        response = await _search(
             query=query,
             max_results=max_results,
             topic="news",
@@ -259,7 +391,7 @@ async def tavily_news_search(
             response["excluded_domains"] = exclude_domains_list
             
         return format_results(response)
-    except (InvalidAPIKeyError, UsageLimitExceededError) as e:
+    except _api_errors() as e:
         error_msg = f"Tavily API error: {str(e)}"
         logger.error(error_msg)
         return error_msg
@@ -269,4 +401,4 @@ async def tavily_news_search(
         return error_msg
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    mcp_transport.serve(mcp, "tavily")
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+MCP 서버 transport 설정
+- 모든 MCP 서버의 이름, 스크립트, 기본 포트를 한 곳에서 관리
+- serve(): 서버 스크립트의 __main__에서 호출. stdio(기본) 또는 streamable-http/sse로 실행
+- create_client(): chat.py가 사용하는 MCPClient 생성
+    * MCP_TRANSPORT=stdio: 요청마다 서버 프로세스를 직접 실행 (기존 방식)
+    * MCP_TRANSPORT=streamable-http 또는 sse: launcher가 띄워 둔 공유 서버에 연결
+
+공유 서버 실행 (저장소 루트에서):
+    python application/launcher.py --transport streamable-http --replicas 2
+    MCP_TRANSPORT=streamable-http streamlit run application/app.py
+
+설정 (환경 변수):
+    MCP_TRANSPORT           stdio | streamable-http | sse
+    MCP_HOST                서버 bind/연결 주소 (기본 127.0.0.1, 인증이 없으므로 외부 노출 주의)
+    MCP_<NAME>_PORT         서버별 포트 (예: MCP_PUBMED_PORT=9103)
+    MCP_<NAME>_URL          서버별 전체 URL (다른 호스트의 서버를 사용할 때)
+    MCP_REPLICAS            서버별 replica 수. replica i는 포트 + i 사용, 클라이언트는 replica를 돌아가며 연결
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import sys
+import threading
+from typing import Dict, List, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("mcp_transport")
+
+# .env에 transport 설정을 둘 수 있도록 설정을 읽기 전에 로드
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+HTTP_PATHS = {"streamable-http": "/mcp", "sse": "/sse"}
+
+# 이름 -> (서버 스크립트, 기본 포트). replica를 위해 포트 간격을 10으로 둠
+SERVERS: Dict[str, Tuple[str, int]] = {
+    "google_scholar": ("application/mcp_server_google_scholar.py", 8100),
+    "google_search": ("application/mcp_server_google_search.py", 8110),
+    "tavily": ("application/mcp_server_tavily.py", 8120),
+    "arxiv": ("application/mcp_server_arxiv.py", 8130),
+    "pubmed": ("application/mcp_server_pubmed.py", 8140),
+    "chembl": ("application/mcp_server_chembl.py", 8150),
+    "clinicaltrials": ("application/mcp_server_clinicaltrial.py", 8160),
+}
+MAX_REPLICAS = 10
+
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_REPLICAS = min(MAX_REPLICAS, max(1, int(os.getenv("MCP_REPLICAS", "1"))))
+
+def server_name(script: str) -> str:
+    """서버 스크립트 경로 -> 서버 이름"""
+    for name, (path, _) in SERVERS.items():
+        if os.path.basename(path) == os.path.basename(script):
+            return name
+    raise ValueError(f"Unknown MCP server: {script}")
+
+def port(name: str, replica: int = 0) -> int:
+    base = int(os.getenv(f"MCP_{name.upper()}_PORT", str(SERVERS[name][1])))
+    return base + replica
+
+def urls(name: str, transport: str = MCP_TRANSPORT) -> List[str]:
+    """서버의 모든 replica URL"""
+    override = os.getenv(f"MCP_{name.upper()}_URL")
+    if override:
+        return [override]
+    return [f"http://{MCP_HOST}:{port(name, replica)}{HTTP_PATHS[transport]}" for replica in range(MCP_REPLICAS)]
+
+_replica_cycles: Dict[str, "itertools.cycle"] = {}
+_cycle_lock = threading.Lock()
+
+def _next_url(name: str) -> str:
+    with _cycle_lock:
+        if name not in _replica_cycles:
+            _replica_cycles[name] = itertools.cycle(urls(name))
+        return next(_replica_cycles[name])
+
+def create_client(name: str):
+    """설정된 transport로 서버에 연결하는 MCPClient (연결은 with 블록에 들어갈 때 이루어짐)"""
+    from strands.tools.mcp import MCPClient
+
+    if MCP_TRANSPORT == "stdio":
+        from mcp import StdioServerParameters, stdio_client
+        script = SERVERS[name][0]
+        return MCPClient(lambda: stdio_client(StdioServerParameters(command="python", args=[script])))
+
+    # 같은 클라이언트는 다시 연결해도 같은 replica를 사용 (세션 상태가 replica별로 유지되므로)
+    url = _next_url(name)
+    if MCP_TRANSPORT == "sse":
+        from mcp.client.sse import sse_client
+        return MCPClient(lambda: sse_client(url))
+
+    from mcp.client.streamable_http import streamablehttp_client
+    return MCPClient(lambda: streamablehttp_client(url))
+
+def serve(mcp, name: str):
+    """서버 스크립트의 진입점. 명령행 인자(--transport, --host, --port)가 환경 변수보다 우선"""
+    parser = argparse.ArgumentParser(description=f"{name} MCP server")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=MCP_TRANSPORT)
+    parser.add_argument("--host", default=MCP_HOST)
+    parser.add_argument("--port", type=int, default=port(name))
+    args = parser.parse_args()
+
+    if args.transport != "stdio":
+        # 공유 서버로 오래 실행될 때만 metrics 기록 (stdio 서버는 요청마다 새 프로세스)
+        import metrics
+        metrics.enable()
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        logger.info(f"{name} MCP server listening on http://{args.host}:{args.port}{HTTP_PATHS[args.transport]}")
+    mcp.run(transport=args.transport)
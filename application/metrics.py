@@ -0,0 +1,239 @@
+"""
+Prometheus 형식 metrics
+- MCP tool handler, 에이전트, Bedrock 호출은 tracing span이 끝날 때 자동으로 집계
+- 캐시 hit/miss, upstream throttling(429 등), MCP 풀 사용량은 호출 지점에서 직접 기록
+- MCP 서버는 별도 프로세스이므로 prometheus_client multiprocess 모드로 METRICS_DIR에 모아서 노출
+- MCP 서버는 launcher가 HTTP transport로 띄운 경우에만 기록 (stdio 서버는 요청마다 새 프로세스라
+  프로세스별 파일만 쌓이므로 기록하지 않음)
+- prometheus_client가 설치되어 있지 않으면 모든 기록 함수는 아무 일도 하지 않음
+
+metrics 노출 (API 서버는 /metrics로도 제공):
+    python application/metrics.py --port 9464
+"""
+
+import argparse
+import glob
+import importlib.util
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from typing import Optional
+
+import tracing
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("metrics")
+
+METRICS_ENABLED = os.getenv("METRICS", "1").lower() not in ("0", "false", "no")
+METRICS_DIR = os.path.abspath(os.getenv("PROMETHEUS_MULTIPROC_DIR", "cache/metrics"))
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+
+TOOL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+REQUEST_BUCKETS = (1, 5, 10, 30, 60, 120, 180, 240, 300, 600, 900)
+
+# prometheus_client는 import 시점에 multiprocess 모드를 결정하고 metric 생성 시 파일을 만들므로,
+# import만으로 환경 변수를 바꾸거나 파일을 남기지 않도록 enable()/render()에서 처음 필요할 때 로드
+PROMETHEUS_AVAILABLE = importlib.util.find_spec("prometheus_client") is not None
+
+class _Metrics:
+    """prometheus_client metric 정의 (_load()에서 한 번만 생성)"""
+
+    def __init__(self):
+        from prometheus_client import Counter, Gauge, Histogram
+
+        self.mcp_tool_requests = Counter("mcp_tool_requests_total", "MCP tool handler calls",
+                                         ["server", "tool", "status"])
+        self.mcp_tool_latency = Histogram("mcp_tool_latency_seconds", "MCP tool handler latency",
+                                          ["server", "tool"], buckets=TOOL_BUCKETS)
+        self.agent_latency = Histogram("agent_latency_seconds", "Agent and orchestrator step latency",
+                                       ["agent", "status"], buckets=REQUEST_BUCKETS)
+        self.chat_requests = Counter("chat_requests_total", "Orchestrator requests", ["status"])
+        self.chat_latency = Histogram("chat_request_latency_seconds", "Orchestrator request latency",
+                                      buckets=REQUEST_BUCKETS)
+        self.chat_first_text = Histogram("chat_time_to_first_text_seconds", "Time until the first answer text",
+                                         buckets=REQUEST_BUCKETS)
+        self.bedrock_requests = Counter("bedrock_requests_total", "Bedrock stream attempts",
+                                        ["model", "region", "status"])
+        self.bedrock_first_event = Histogram("bedrock_time_to_first_event_seconds",
+                                             "Bedrock time to first stream event",
+                                             ["model", "region"], buckets=TOOL_BUCKETS)
+        self.bedrock_tokens = Counter("bedrock_tokens_total", "Bedrock token usage", ["model", "direction"])
+        self.cache_requests = Counter("cache_requests_total", "Cache lookups", ["cache", "result"])
+        self.upstream_errors = Counter("upstream_errors_total", "Upstream API errors (throttled = 429/quota)",
+                                       ["service", "kind"])
+        self.mcp_pool_in_use = Gauge("mcp_pool_in_use", "MCP client sets currently checked out",
+                                     multiprocess_mode="livesum")
+
+_metrics: Optional[_Metrics] = None
+_load_lock = threading.Lock()
+
+def _configure():
+    """모든 프로세스가 같은 디렉터리에 기록해야 하므로 prometheus_client import 전에 호출"""
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = METRICS_DIR
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+def _load() -> _Metrics:
+    global _metrics
+    with _load_lock:
+        if _metrics is None:
+            _configure()
+            _metrics = _Metrics()
+        return _metrics
+
+def _observe_span(span):
+    """tracing span이 끝날 때 호출되어 latency/요청 수/토큰을 집계"""
+    seconds = (span.end_time - span.start)
+    attributes = span.attributes
+    if span.name.startswith("mcp."):
+        server = attributes.get("server", tracing.SERVICE_NAME)
+        tool = span.name[len("mcp."):]
+        _metrics.mcp_tool_requests.labels(server, tool, span.status).inc()
+        _metrics.mcp_tool_latency.labels(server, tool).observe(seconds)
+    elif span.name == "bedrock.stream":
+        model, region = attributes.get("model_id", ""), attributes.get("region", "")
+        status = "throttled" if attributes.get("throttled") else span.status
+        _metrics.bedrock_requests.labels(model, region, status).inc()
+        if "time_to_first_event_ms" in attributes:
+            _metrics.bedrock_first_event.labels(model, region).observe(attributes["time_to_first_event_ms"] / 1000)
+        if attributes.get("inputTokens"):
+            _metrics.bedrock_tokens.labels(model, "input").inc(attributes["inputTokens"])
+        if attributes.get("outputTokens"):
+            _metrics.bedrock_tokens.labels(model, "output").inc(attributes["outputTokens"])
+    elif span.name == "request":
+        _metrics.chat_requests.labels(span.status).inc()
+        _metrics.chat_latency.observe(seconds)
+        if "time_to_first_text_ms" in attributes:
+            _metrics.chat_first_text.observe(attributes["time_to_first_text_ms"] / 1000)
+    elif attributes.get("kind") == "agent":
+        _metrics.agent_latency.labels(span.name, span.status).observe(seconds)
+
+# enable()하지 않은 프로세스(예: 요청마다 실행되는 stdio MCP 서버)에서는 아무 일도 하지 않음
+def record_cache(cache: str, hit: bool):
+    if _enabled and _metrics is not None:
+        _metrics.cache_requests.labels(cache, "hit" if hit else "miss").inc()
+
+def record_upstream_error(service: str, throttled: bool = False):
+    if _enabled and _metrics is not None:
+        _metrics.upstream_errors.labels(service, "throttled" if throttled else "error").inc()
+
+def record_pool_usage(delta: int):
+    if _enabled and _metrics is not None:
+        _metrics.mcp_pool_in_use.inc(delta)
+
+_enabled = False
+
+def enable():
+    """현재 프로세스의 span을 metrics로 집계 (여러 번 호출해도 한 번만 등록)
+
+    METRICS_DIR에 프로세스별 파일이 생기므로 오래 실행되는 프로세스(chat/API 서버, launcher가 띄운
+    HTTP MCP 서버)에서만 호출
+    """
+    global _enabled
+    if _enabled or not METRICS_ENABLED:
+        return
+    if not PROMETHEUS_AVAILABLE:
+        logger.info("prometheus_client not installed - metrics disabled")
+        return
+    _load()
+    _enabled = True
+    tracing.add_listener(_observe_span)
+
+    import atexit
+    pid = os.getpid()
+    atexit.register(lambda: mark_process_dead(pid))
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def clear_dead():
+    """이미 종료된 프로세스가 남긴 multiprocess 파일만 삭제
+
+    chat/API 서버 등 같은 디렉터리에 기록 중인 다른 프로세스의 파일은 그대로 둠
+    (파일 이름: <metric 종류>_<pid>.db)
+    """
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.db")):
+        try:
+            pid = int(os.path.splitext(os.path.basename(path))[0].rsplit("_", 1)[1])
+        except (IndexError, ValueError):
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def mark_process_dead(pid: int):
+    """비정상 종료된 프로세스의 live gauge 정리 (atexit가 실행되지 않은 경우 launcher가 호출)"""
+    if PROMETHEUS_AVAILABLE and METRICS_ENABLED:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid, METRICS_DIR)
+
+class _JobQueueCollector:
+    """작업 큐(jobs.sqlite3)의 상태별 작업 수를 scrape 시점에 조회"""
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+        depth = GaugeMetricFamily("job_queue_jobs", "Jobs in the report queue by status", labels=["status"])
+        oldest = GaugeMetricFamily("job_queue_oldest_queued_seconds", "Age of the oldest queued job")
+        if os.path.exists(JOB_DB_PATH):
+            try:
+                with closing(sqlite3.connect(JOB_DB_PATH, timeout=2)) as conn:
+                    for status in ("queued", "running"):
+                        count = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+                        depth.add_metric([status], count)
+                    row = conn.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()
+                    oldest.add_metric([], time.time() - row[0] if row[0] else 0)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to read job queue metrics: {e}")
+        yield depth
+        yield oldest
+
+def registry():
+    """모든 프로세스의 metrics를 합친 registry"""
+    _configure()
+    from prometheus_client import CollectorRegistry, multiprocess
+    combined = CollectorRegistry()
+    multiprocess.MultiProcessCollector(combined, METRICS_DIR)
+    combined.register(_JobQueueCollector())
+    return combined
+
+def render():
+    """Prometheus text exposition (본문, content type)"""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client not installed\n", "text/plain; charset=utf-8"
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Prometheus metrics for all local processes")
+    parser.add_argument("--port", type=int, default=METRICS_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+    if not PROMETHEUS_AVAILABLE:
+        sys.exit("prometheus_client is not installed")
+
+    from prometheus_client import start_http_server
+    start_http_server(args.port, addr=args.host, registry=registry())
+    logger.info(f"Serving metrics on http://{args.host}:{args.port}/metrics (from {METRICS_DIR})")
+    while True:
+        time.sleep(3600)
+
+if __name__ == "__main__":
+    main()
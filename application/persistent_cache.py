@@ -0,0 +1,86 @@
+"""
+MCP 서버가 공유하는 영구 저장소 (SQLite)
+- PersistentCache: TTL이 있는 key-value 캐시 (값은 JSON으로 저장)
+- UsageLedger: 기간별 API 사용량 기록 (일/월 quota 관리)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Optional
+
+def _prepare_path(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+class PersistentCache:
+    """SQLite 기반 TTL 캐시 (값은 JSON으로 저장)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        _prepare_path(path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """캐시 값 조회 (allow_stale=True이면 만료된 값도 반환)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] < time.time() and not allow_stale):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), time.time() + ttl),
+            )
+
+class UsageLedger:
+    """기간(예: '2025-01-31')별 API 호출 수 기록"""
+
+    def __init__(self, path: str):
+        self.path = path
+        _prepare_path(path)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage (api TEXT NOT NULL, period TEXT NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (api, period))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def used(self, api: str, period: str) -> int:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT count FROM usage WHERE api = ? AND period = ?", (api, period)).fetchone()
+        return row[0] if row else 0
+
+    def try_consume(self, api: str, period: str, limit: int, amount: int = 1) -> bool:
+        """limit을 넘지 않으면 사용량을 amount만큼 늘리고 True 반환 (프로세스 간 원자적)"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT count FROM usage WHERE api = ? AND period = ?", (api, period)).fetchone()
+                count = row[0] if row else 0
+                if count + amount > limit:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO usage (api, period, count) VALUES (?, ?, ?)",
+                    (api, period, count + amount),
+                )
+                conn.execute("COMMIT")
+                return True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
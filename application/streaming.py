@@ -0,0 +1,140 @@
+"""
+Strands stream_async와 Streamlit 사이의 스트리밍 연결
+- 에이전트는 요청마다 새 백그라운드 event loop에서 실행 (Streamlit 스크립트 스레드와 다른 세션을 막지 않음)
+- 토큰은 queue로 전달되고, 스크립트 스레드가 시간/크기 단위로 모아서 렌더링
+- 완성된 문단은 고정된 요소로 한 번만 그리고, 작성 중인 마지막 문단만 다시 그림
+"""
+
+import asyncio
+import logging
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("streaming")
+
+# 렌더링 주기 (초)와 즉시 렌더링할 누적 글자 수
+FLUSH_INTERVAL = 0.15
+FLUSH_CHARS = 400
+
+class BackgroundLoop:
+    """별도 스레드에서 실행되는 asyncio event loop"""
+
+    def __init__(self, name: str = "agent-loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+            self.loop.close()
+
+    def submit(self, coro) -> Future:
+        """코루틴을 백그라운드 loop에서 실행하고 concurrent Future 반환"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+def run_in_background(coro, name: str = "agent-loop") -> Future:
+    """코루틴을 전용 event loop 스레드에서 실행하고, 끝나면 loop를 종료
+
+    요청마다 loop를 따로 두므로 한 세션의 blocking 작업(MCP 연결 등)이 다른 세션의 스트리밍을 멈추지 않음
+    """
+    background = BackgroundLoop(name)
+    future = background.submit(coro)
+    future.add_done_callback(lambda _: background.stop())
+    return future
+
+def _split_point(text: str) -> int:
+    """코드 블록 밖에 있는 마지막 문단 경계 위치 (없으면 -1)"""
+    index = text.rfind("\n\n")
+    while index > 0:
+        if text[:index].count("```") % 2 == 0:
+            return index
+        index = text.rfind("\n\n", 0, index)
+    return -1
+
+class StreamRenderer:
+    """토큰을 모아 Streamlit container에 append-only로 렌더링
+
+    feed()는 어느 스레드에서나 호출할 수 있고, run()은 Streamlit 스크립트 스레드에서 호출합니다.
+    """
+
+    def __init__(self, container, flush_interval: float = FLUSH_INTERVAL, flush_chars: int = FLUSH_CHARS):
+        self.container = container
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._chunks = []
+        self._tail = ""
+        self._tail_placeholder = None
+
+    @property
+    def text(self) -> str:
+        """지금까지 렌더링된 전체 텍스트"""
+        return "".join(self._chunks)
+
+    def feed(self, text: str):
+        self._queue.put(text)
+
+    def _flush(self, pending: list):
+        delta = "".join(pending)
+        self._chunks.append(delta)
+        self._tail += delta
+
+        if self._tail_placeholder is None:
+            self._tail_placeholder = self.container.empty()
+
+        # 완성된 문단은 현재 요소에 마지막으로 그리고 고정, 이후는 새 요소에서 계속
+        split = _split_point(self._tail)
+        if split > 0:
+            self._tail_placeholder.markdown(self._tail[:split])
+            self._tail = self._tail[split + 2:]
+            self._tail_placeholder = self.container.empty()
+
+        if self._tail:
+            self._tail_placeholder.markdown(self._tail)
+
+    def run(self, future: Future, timeout: Optional[float] = None):
+        """future가 끝날 때까지 토큰을 모아 렌더링하고 결과 반환"""
+        deadline = time.monotonic() + timeout if timeout else None
+        pending = []
+        pending_chars = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                pending.append(item)
+                pending_chars += len(item)
+            except queue.Empty:
+                pass
+
+            done = future.done() and self._queue.empty()
+            now = time.monotonic()
+            if pending and (done or pending_chars >= self.flush_chars or now - last_flush >= self.flush_interval):
+                self._flush(pending)
+                pending = []
+                pending_chars = 0
+                last_flush = now
+
+            if done:
+                return future.result()
+            if deadline and now > deadline:
+                future.cancel()
+                raise TimeoutError("Streaming response timed out")
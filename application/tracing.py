@@ -0,0 +1,364 @@
+"""
+요청 단위 tracing (OpenTelemetry 호환)
+- span(): 현재 span의 자식 span을 만들고 contextvars로 전파 (asyncio task, to_thread까지 이어짐)
+- traced(): 함수(동기/비동기) 전체를 span으로 감싸는 decorator
+- instrument_mcp(): FastMCP 서버의 모든 tool handler를 span으로 감쌈
+- TRACING=1일 때 완료된 span을 JSONL 파일(TRACE_FILE)에 기록하고, OTEL_EXPORTER_OTLP_ENDPOINT가
+  설정되어 있고 opentelemetry-sdk가 설치되어 있으면 OTLP로도 전송 (기본값은 비활성)
+- TRACE_FILE이 TRACE_FILE_MAX_BYTES를 넘으면 TRACE_FILE.1로 옮기고 새 파일에 기록 (이전 .1은 삭제)
+
+요청별 critical path 요약:
+    python application/tracing.py summary --last 5
+"""
+
+import argparse
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(filename)s:%(lineno)d | %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stderr)
+    ]
+)
+logger = logging.getLogger("tracing")
+
+TRACING_ENABLED = os.getenv("TRACING", "0").lower() in ("1", "true", "yes")
+TRACE_FILE = os.getenv("TRACE_FILE", "cache/traces.jsonl")
+TRACE_FILE_MAX_BYTES = int(os.getenv("TRACE_FILE_MAX_BYTES", str(50 * 1024 * 1024)))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME") or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+
+# 토큰 사용량 속성 이름 (Bedrock Converse usage 키 기준)
+USAGE_KEYS = ("inputTokens", "outputTokens", "totalTokens")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_write_lock = threading.Lock()
+# span이 끝날 때 호출되는 함수 (예: metrics 집계)
+_listeners: List[Callable[["Span"], None]] = []
+
+_otel_tracer = None
+_otel_checked = False
+_otel_lock = threading.Lock()
+
+def _get_otel_tracer():
+    """OTLP exporter가 설정된 경우에만 OpenTelemetry tracer 생성 (없으면 None)"""
+    global _otel_tracer, _otel_checked
+    with _otel_lock:
+        if _otel_checked:
+            return _otel_tracer
+        _otel_checked = True
+        if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            return None
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            except ImportError:
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        except ImportError as e:
+            logger.warning(f"OTLP export disabled, opentelemetry packages not installed: {e}")
+            return None
+        provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        _otel_tracer = provider.get_tracer("drug-discovery-agent")
+        logger.info(f"OTLP trace export enabled ({os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT')})")
+        return _otel_tracer
+
+def _otel_value(value: Any):
+    return value if isinstance(value, (str, bool, int, float)) else json.dumps(value, ensure_ascii=False, default=str)
+
+class Span:
+    """하나의 작업 구간. end()가 호출되면 기록됨"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.start = time.time()
+        self.end_time: Optional[float] = None
+        self._otel = None
+
+        tracer = _get_otel_tracer() if TRACING_ENABLED else None
+        if tracer is not None:
+            from opentelemetry import trace
+            context = trace.set_span_in_context(parent._otel) if parent is not None and parent._otel else None
+            self._otel = tracer.start_span(name, context=context)
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_usage(self, usage: Optional[dict]):
+        """토큰 사용량 누적"""
+        for key in USAGE_KEYS:
+            if usage and usage.get(key):
+                self.attributes[key] = self.attributes.get(key, 0) + usage[key]
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if self._otel is not None:
+            for key, value in self.attributes.items():
+                self._otel.set_attribute(key, _otel_value(value))
+            if self.status == "error":
+                from opentelemetry.trace import Status, StatusCode
+                self._otel.set_status(Status(StatusCode.ERROR, self.attributes.get("error")))
+            self._otel.end()
+        for listener in _listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.warning(f"Span listener failed: {e}")
+        if TRACING_ENABLED:
+            _write(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": SERVICE_NAME,
+            "start": self.start,
+            "duration_ms": round(((self.end_time or time.time()) - self.start) * 1000, 1),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class _NoopSpan(Span):
+    """tracing이 꺼져 있을 때 사용하는 빈 span"""
+
+    def __init__(self):
+        self.attributes = {}
+
+    def set_attribute(self, key, value):
+        pass
+
+    def add_usage(self, usage):
+        pass
+
+    def record_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+_NOOP = _NoopSpan()
+
+def _rotate():
+    """파일이 최대 크기를 넘었으면 한 세대만 보관하고 새 파일로 교체"""
+    if TRACE_FILE_MAX_BYTES <= 0:
+        return
+    try:
+        if os.path.getsize(TRACE_FILE) < TRACE_FILE_MAX_BYTES:
+            return
+        # 다른 프로세스가 먼저 교체했으면 FileNotFoundError (무시)
+        os.replace(TRACE_FILE, TRACE_FILE + ".1")
+    except FileNotFoundError:
+        pass
+
+def _write(span: Span):
+    if not TRACE_FILE:
+        return
+    line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+    try:
+        with _write_lock:
+            directory = os.path.dirname(TRACE_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _rotate()
+            # 여러 프로세스(MCP 서버 포함)가 같은 파일에 한 줄씩 append
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        logger.warning(f"Failed to write span: {e}")
+
+def _active() -> bool:
+    return TRACING_ENABLED or bool(_listeners)
+
+def add_listener(listener: Callable[[Span], None]):
+    """span이 끝날 때마다 호출할 함수 등록 (TRACING=0이어도 span은 만들어짐)"""
+    _listeners.append(listener)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(name: str, **attributes) -> Span:
+    """현재 span의 자식 span 시작 (현재 span으로 설정하지 않음, end()를 직접 호출)"""
+    if not _active():
+        return _NOOP
+    return Span(name, _current_span.get(), attributes)
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """현재 span의 자식 span을 만들고 블록 안에서 현재 span으로 설정"""
+    if not _active():
+        yield _NOOP
+        return
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+def set_attribute(key: str, value: Any):
+    """현재 span에 속성 추가 (span이 없으면 무시)"""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+def increment(key: str, amount: int = 1):
+    """현재 span의 숫자 속성 증가 (예: 캐시 hit/miss 횟수)"""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, current.attributes.get(key, 0) + amount)
+
+def record_usage(result: Any):
+    """Strands AgentResult의 누적 토큰 사용량을 현재 span에 기록"""
+    current = _current_span.get()
+    metrics = getattr(result, "metrics", None)
+    usage = getattr(metrics, "accumulated_usage", None)
+    if current is not None and usage:
+        current.add_usage(dict(usage))
+
+def traced(name: Optional[str] = None, **attributes):
+    """함수 호출을 span으로 감싸는 decorator (동기/비동기 함수 모두 지원, signature 유지)"""
+    def decorator(func):
+        span_name = name or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def instrument_mcp(server):
+    """FastMCP 서버에 이후 등록되는 모든 tool handler를 span으로 감쌈"""
+    original_tool = server.tool
+
+    def tool(*args, **kwargs):
+        register = original_tool(*args, **kwargs)
+
+        def decorator(func):
+            register(traced(f"mcp.{func.__name__}", kind="mcp_tool", server=server.name)(func))
+            return func
+        return decorator
+
+    server.tool = tool
+    return server
+
+#########################################################
+# Summary
+#########################################################
+
+def load_spans(path: str = TRACE_FILE) -> List[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+def critical_path(root: dict, children: Dict[str, List[dict]]) -> List[dict]:
+    """root가 끝나기까지 기다린 자식 span들을 끝 시각 기준으로 역추적한 경로"""
+    path = [root]
+    cursor = root["start"] + root["duration_ms"] / 1000
+    candidates = sorted(children.get(root["span_id"], []), key=lambda s: s["start"] + s["duration_ms"] / 1000)
+    chosen = []
+    for child in reversed(candidates):
+        child_end = child["start"] + child["duration_ms"] / 1000
+        if child_end <= cursor + 1e-6:
+            chosen.append(child)
+            cursor = child["start"]
+    for child in reversed(chosen):
+        path.extend(critical_path(child, children))
+    return path
+
+def summarize(spans: List[dict], last: int = 5) -> str:
+    by_trace: Dict[str, List[dict]] = {}
+    for item in spans:
+        by_trace.setdefault(item["trace_id"], []).append(item)
+
+    roots = [item for item in spans if item["parent_id"] is None and item["name"] == "request"]
+    roots.sort(key=lambda item: item["start"])
+    lines = []
+    for root in roots[-last:]:
+        children: Dict[str, List[dict]] = {}
+        for item in by_trace[root["trace_id"]]:
+            if item["parent_id"]:
+                children.setdefault(item["parent_id"], []).append(item)
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(root["start"]))
+        question = root["attributes"].get("question", "")
+        lines.append(f"\n=== {started} {root['duration_ms'] / 1000:.1f}s {question[:60]}")
+        # 에이전트 span에도 같은 사용량이 누적되므로 모델 호출 span만 합산
+        tokens = sum(item["attributes"].get("totalTokens", 0) for item in by_trace[root["trace_id"]]
+                     if item["name"].startswith("bedrock."))
+        lines.append(f"spans: {len(by_trace[root['trace_id']])}, tokens: {tokens}")
+        lines.append("critical path:")
+        for item in critical_path(root, children):
+            share = item["duration_ms"] / root["duration_ms"] * 100 if root["duration_ms"] else 0
+            extra = {k: v for k, v in item["attributes"].items() if k in USAGE_KEYS or k.startswith("cache")}
+            lines.append(f"  {item['duration_ms'] / 1000:8.2f}s {share:5.1f}%  {item['name']} {extra or ''}")
+
+    # MCP 서버는 별도 프로세스이므로 tool handler별 통계로 표시
+    stats: Dict[str, List[float]] = {}
+    for item in spans:
+        if item["attributes"].get("kind") == "mcp_tool" or item["name"].startswith("bedrock."):
+            stats.setdefault(f"{item['service']}:{item['name']}", []).append(item["duration_ms"])
+    if stats:
+        lines.append("\n=== tool handlers and model calls")
+        lines.append(f"  {'name':60} {'count':>6} {'p50 (s)':>8} {'p95 (s)':>8}")
+        for key, durations in sorted(stats.items(), key=lambda kv: -sum(kv[1])):
+            durations.sort()
+            p50 = durations[len(durations) // 2] / 1000
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))] / 1000
+            lines.append(f"  {key:60} {len(durations):6d} {p50:8.2f} {p95:8.2f}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary = subparsers.add_parser("summary", help="show the critical path of recent requests")
+    summary.add_argument("--file", default=TRACE_FILE)
+    summary.add_argument("--last", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print(summarize(load_spans(args.file), args.last))
+
+if __name__ == "__main__":
+    main()
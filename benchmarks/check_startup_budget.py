@@ -0,0 +1,61 @@
+"""
+MCP 서버 cold start 예산 확인 (CI 없이 로컬에서 실행)
+- startup_budgets.json의 서버별 예산(ms)과 startup_time.py 측정값(중앙값)을 비교
+- 예산을 넘은 서버가 있으면 목록을 출력하고 exit code 1로 종료
+
+    python benchmarks/check_startup_budget.py
+    python benchmarks/check_startup_budget.py --servers arxiv --runs 5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import startup_time
+
+BUDGET_FILE = os.path.join(startup_time.BENCH_DIR, "startup_budgets.json")
+
+def load_budgets(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    default = config["default"]
+    return {name: dict(default, **config.get("servers", {}).get(name, {})) for name in startup_time.mcp_transport.SERVERS}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check MCP server cold-start times against their budgets")
+    startup_time.add_arguments(parser)
+    parser.add_argument("--budgets", default=BUDGET_FILE)
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budgets)
+    failures = []
+    for name in startup_time.server_names(args):
+        budget = budgets[name]
+        try:
+            result = startup_time.measure(name, args.runs)
+        except Exception as e:
+            failures.append(f"{name}: measurement failed - {e}")
+            print(f"FAIL {name}: {e}")
+            continue
+
+        over = [
+            f"{metric} {result[f'{metric}_ms']:.0f} ms > {budget[f'{metric}_ms']} ms"
+            for metric in ("import", "ready") if result[f"{metric}_ms"] > budget[f"{metric}_ms"]
+        ]
+        status = "FAIL" if over else "ok  "
+        print(f"{status} {name}: import {result['import_ms']:.0f}/{budget['import_ms']} ms, "
+              f"ready {result['ready_ms']:.0f}/{budget['ready_ms']} ms")
+        if over:
+            heaviest = ", ".join(f"{module} {ms:.0f} ms" for module, ms in result["top_level"][:3])
+            failures.append(f"{name}: {'; '.join(over)} (heaviest imports: {heaviest})")
+
+    if failures:
+        print("\nCold-start budget exceeded:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll servers within their cold-start budgets.")
+
+if __name__ == "__main__":
+    main()
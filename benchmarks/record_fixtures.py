@@ -0,0 +1,101 @@
+"""
+실제 MCP 서버를 호출하여 benchmark fixture 녹화 (네트워크와 API 키 필요)
+- 서버별로 정해진 tool 호출을 실행하고 응답 텍스트, 지연 시간, tool 설명/인자를 fixtures/<이름>.json에 저장
+- tavily, google_search는 TAVILY_API_KEY, GOOGLE_API_KEY/GOOGLE_CSE_ID가 필요
+
+    python benchmarks/record_fixtures.py --servers pubmed,arxiv
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+from mcp import StdioServerParameters, stdio_client  # noqa: E402
+from strands.tools.mcp import MCPClient  # noqa: E402
+
+# fixture 이름 -> (서버 스크립트, 서버 이름, [(tool 이름, 인자)])
+RECORDINGS = {
+    "pubmed": ("application/mcp_server_pubmed.py", "pubmed_tools", [
+        ("pubmed_search", {"query": "HER2 breast cancer trastuzumab deruxtecan", "max_results": 5}),
+        ("pubmed_get_article", {"pmid": "35665782"}),
+    ]),
+    "arxiv": ("application/mcp_server_arxiv.py", "arxiv_tools", [
+        ("search_papers", {"query": "HER2 inhibitor binding affinity", "max_results": 5}),
+        ("read_paper", {"paper_id": "2102.09844"}),
+    ]),
+    "chembl": ("application/mcp_server_chembl.py", "chembl_tools", [
+        ("target_activity", {"target_name": "HER2"}),
+        ("compount_activity", {"compound_name": "lapatinib"}),
+    ]),
+    "clinicaltrials": ("application/mcp_server_clinicaltrial.py", "clinicaltrial_tools", [
+        ("get_studies_by_keyword", {"keyword": "HER2", "max_studies": 10, "save_csv": False}),
+        ("get_full_study_details", {"nct_id": "NCT04494425"}),
+    ]),
+    "google_scholar": ("application/mcp_server_google_scholar.py", "google_scholar_tools", [
+        ("google_scholar_search", {"query": "HER2 resistance mechanisms", "max_results": 5}),
+        ("google_scholar_status", {}),
+    ]),
+    "tavily": ("application/mcp_server_tavily.py", "tavily_tools", [
+        ("tavily_web_search", {"query": "HER2 ADC approvals 2024"}),
+        ("tavily_answer_search", {"query": "HER2 ADC approvals 2024"}),
+        ("tavily_news_search", {"query": "HER2 antibody-drug conjugate"}),
+    ]),
+    "google_search": ("application/mcp_server_google_search.py", "google_search_tools", [
+        ("google_web_search", {"query": "HER2 ADC approvals 2024", "num_results": 5}),
+        ("google_news_search", {"query": "HER2 antibody-drug conjugate", "num_results": 5}),
+        ("google_search_quota", {}),
+    ]),
+}
+
+def _params(spec: dict) -> dict:
+    properties = spec.get("inputSchema", {}).get("json", {}).get("properties", {})
+    return {name: prop.get("type", "string") for name, prop in properties.items()}
+
+def record(name: str, output_dir: str):
+    script, server, calls = RECORDINGS[name]
+    client = MCPClient(lambda: stdio_client(StdioServerParameters(command=sys.executable, args=[script])))
+    tools = []
+    with client:
+        specs = {tool.tool_name: tool.tool_spec for tool in client.list_tools_sync()}
+        for index, (tool_name, arguments) in enumerate(calls):
+            started = time.perf_counter()
+            result = client.call_tool_sync(f"record-{index}", tool_name, arguments)
+            latency = time.perf_counter() - started
+            text = "\n".join(block.get("text", "") for block in result.get("content", []))
+            print(f"{name}.{tool_name}: {latency:.2f}s, {len(text)} chars, status={result.get('status')}")
+            spec = specs.get(tool_name, {})
+            tools.append({
+                "name": tool_name,
+                "description": spec.get("description", ""),
+                "params": _params(spec),
+                "arguments": arguments,
+                "latency": round(latency, 3),
+                "response": text,
+            })
+
+    path = os.path.join(output_dir, f"{name}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"server": server, "recorded": True,
+                   "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "tools": tools},
+                  f, ensure_ascii=False, indent=2)
+    print(f"Wrote {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Record MCP server responses as benchmark fixtures")
+    parser.add_argument("--servers", default=",".join(RECORDINGS))
+    parser.add_argument("--output-dir", default=os.path.join(BENCH_DIR, "fixtures"))
+    args = parser.parse_args()
+
+    os.chdir(ROOT_DIR)
+    for name in args.servers.split(","):
+        if name not in RECORDINGS:
+            sys.exit(f"Unknown server: {name} (choose from {', '.join(RECORDINGS)})")
+        record(name, args.output_dir)
+
+if __name__ == "__main__":
+    main()
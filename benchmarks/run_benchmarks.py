@@ -0,0 +1,239 @@
+"""
+오프라인 end-to-end benchmark
+- Bedrock 모델은 stub_model.StubModel로, MCP 서버는 녹화된 응답을 돌려주는 stub_mcp_server.py로 대체
+- 시나리오별로 여러 동시 실행 수준에서 지연 시간(p50/p95), 처리량, 단계별 시간(tracing span), 메모리 측정
+- 결과는 표로 출력하고 benchmarks/results/<시각>.json에 저장
+
+시나리오:
+    research         chat.run_multi_agent_system (Streamlit 경로, 요청마다 MCP 서버 새로 실행)
+    research-pooled  chat.generate_answer + MCP 클라이언트 풀 (API/batch 경로)
+    fast             chat_fast.run_fast_report
+
+사용 예 (저장소 루트에서):
+    python benchmarks/run_benchmarks.py --scenarios research,fast --concurrency 1,4,8 --requests 8
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "application"))
+sys.path.insert(0, BENCH_DIR)
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+STUB_SERVER = os.path.join(BENCH_DIR, "stub_mcp_server.py")
+SCENARIOS = ("research", "research-pooled", "fast")
+QUESTIONS = [
+    "HER2에 대한 최신 연구와 관련 화합물 보고서를 생성해주세요",
+    "BRCA1 억제제에 대한 최근 연구 논문을 찾아주세요",
+    "알츠하이머 치료제 개발 현황을 알려주세요",
+]
+
+class _NullStreamlit:
+    """run_multi_agent_system에 넘기는 Streamlit 대역 (모든 호출을 무시)"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+def _fixtures():
+    """fixture 파일 이름(chat의 MCP 클라이언트 키) -> 경로"""
+    return {
+        os.path.splitext(name)[0]: os.path.join(FIXTURES_DIR, name)
+        for name in sorted(os.listdir(FIXTURES_DIR)) if name.endswith(".json")
+    }
+
+def install_stubs(model_options: dict):
+    """Bedrock 모델과 MCP 클라이언트를 stub으로 교체하고 (chat, chat_fast) 반환"""
+    from mcp import StdioServerParameters, stdio_client
+    from strands.tools.mcp import MCPClient
+
+    import bedrock_router
+    import chat
+    import chat_fast
+    from stub_model import StubModel
+
+    bedrock_router.get_routed_model = lambda name, profiles, boto_config, **params: StubModel(**model_options)
+    bedrock_router.get_bedrock_model = lambda region, model_id, boto_config, **params: StubModel(**model_options)
+
+    fixtures = _fixtures()
+
+    def create_stub_clients():
+        # stdio_client는 기본적으로 일부 환경 변수만 넘기므로 TRACE_FILE 등을 명시적으로 전달
+        return {
+            name: MCPClient(lambda path=path: stdio_client(StdioServerParameters(
+                command=sys.executable, args=[STUB_SERVER, path], env=dict(os.environ),
+            )))
+            for name, path in fixtures.items()
+        }
+
+    chat.create_mcp_clients = create_stub_clients
+    chat.store_cached_answer = lambda *args, **kwargs: None
+    return chat, chat_fast
+
+def _request_runner(scenario: str, chat, chat_fast):
+    if scenario == "research":
+        return lambda question: chat.run_multi_agent_system(question, "Disable", _NullStreamlit(), force_refresh=True)
+
+    if scenario == "research-pooled":
+        pool = chat.get_mcp_pool()
+
+        def run(question):
+            clients = pool.checkout()
+            healthy = False
+            try:
+                answer = asyncio.run(chat.generate_answer(question, "Disable", lambda text: None, clients=clients))
+                healthy = True
+                return answer
+            finally:
+                pool.checkin(clients, healthy=healthy)
+        return run
+
+    return chat_fast.run_fast_report
+
+def _stage_breakdown(trace_file: str, since: float) -> dict:
+    """since 이후에 끝난 span을 이름별로 집계"""
+    import tracing
+
+    stages = {}
+    if not os.path.exists(trace_file):
+        return stages
+    for span in tracing.load_spans(trace_file):
+        if span["start"] < since:
+            continue
+        stage = stages.setdefault(span["name"], {"count": 0, "total_s": 0.0, "tokens": 0})
+        stage["count"] += 1
+        stage["total_s"] += span["duration_ms"] / 1000
+        if span["name"].startswith("bedrock."):
+            stage["tokens"] += span["attributes"].get("totalTokens", 0)
+    for stage in stages.values():
+        stage["mean_s"] = round(stage["total_s"] / stage["count"], 3)
+        stage["total_s"] = round(stage["total_s"], 3)
+    return stages
+
+def run_level(scenario: str, runner, concurrency: int, requests: int, trace_file: str) -> dict:
+    latencies, errors = [], 0
+    questions = [QUESTIONS[index % len(QUESTIONS)] for index in range(requests)]
+
+    def timed(question):
+        started = time.perf_counter()
+        answer = runner(question)
+        if not answer:
+            raise RuntimeError("empty answer")
+        return time.perf_counter() - started
+
+    since = time.time()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(timed, question) for question in questions]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                print(f"  request failed: {e}", file=sys.stderr)
+    wall = time.perf_counter() - started
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency_p50_s": round(statistics.median(latencies), 3) if latencies else None,
+        "latency_p95_s": round(_percentile(latencies, 95), 3) if latencies else None,
+        "latency_max_s": round(max(latencies), 3) if latencies else None,
+        # Linux에서 ru_maxrss 단위는 KB
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": _stage_breakdown(trace_file, since),
+    }
+
+def _print_result(result: dict):
+    print(f"\n[{result['scenario']}] concurrency={result['concurrency']} requests={result['requests']} "
+          f"errors={result['errors']}")
+    print(f"  wall {result['wall_s']}s, throughput {result['throughput_rps']} req/s, "
+          f"p50 {result['latency_p50_s']}s, p95 {result['latency_p95_s']}s, peak RSS {result['peak_rss_mb']} MB")
+    for name, stage in sorted(result["stages"].items(), key=lambda item: -item[1]["total_s"]):
+        tokens = f" tokens={stage['tokens']}" if stage["tokens"] else ""
+        print(f"    {name:45} n={stage['count']:<4} mean {stage['mean_s']:7.3f}s total {stage['total_s']:8.3f}s{tokens}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with stub Bedrock and MCP servers")
+    parser.add_argument("--scenarios", default="research,research-pooled,fast")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=8, help="requests per level (at least the concurrency)")
+    parser.add_argument("--first-token-latency", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--answer-tokens", type=int, default=300)
+    parser.add_argument("--tool-plan", default=None, help="comma separated tool names the stub model calls")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for recorded tool latencies")
+    parser.add_argument("--output", default=None, help="result JSON path")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    # 앱 모듈을 import하기 전에 설정 (tracing, metrics, 캐시 경로는 import 시점에 결정됨)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    trace_file = os.path.join(workdir, "traces.jsonl")
+    os.environ.update({
+        "TRACING": "1",
+        "TRACE_FILE": trace_file,
+        "METRICS": "0",
+        "ANSWER_CACHE_PATH": os.path.join(workdir, "answers.sqlite3"),
+        "STUB_LATENCY_SCALE": str(args.latency_scale),
+        "MCP_POOL_SIZE": str(max(levels)),
+    })
+    os.chdir(ROOT_DIR)
+
+    model_options = {
+        "first_token_latency": args.first_token_latency,
+        "tokens_per_second": args.tokens_per_second,
+        "answer_tokens": args.answer_tokens,
+    }
+    if args.tool_plan is not None:
+        model_options["tool_plan"] = [name for name in args.tool_plan.split(",") if name]
+    chat, chat_fast = install_stubs(model_options)
+
+    results = []
+    for scenario in scenarios:
+        runner = _request_runner(scenario, chat, chat_fast)
+        for level in levels:
+            result = run_level(scenario, runner, level, max(level, args.requests), trace_file)
+            _print_result(result)
+            results.append(result)
+        if scenario == "research-pooled":
+            chat.get_mcp_pool().close()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "config": vars(args),
+            "fixtures": sorted(_fixtures()),
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {output}")
+
+if __name__ == "__main__":
+    main()
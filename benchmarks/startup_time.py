@@ -0,0 +1,140 @@
+"""
+MCP 서버 cold start 측정
+- import: `python -X importtime`으로 서버 모듈만 import (tool 등록까지, 서버 실행 없음)하여 전체 시간과
+  가장 무거운 top-level import 목록 출력
+- ready: 서버를 stdio로 실행하고 MCP initialize 응답을 받을 때까지의 시간 (chat.py가 매 요청 기다리는 시간)
+- 각 값은 --runs 번 측정한 중앙값
+
+    python benchmarks/startup_time.py --servers arxiv,clinicaltrials --runs 5 --top 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "application"))
+
+import mcp_transport  # noqa: E402
+
+READY_TIMEOUT = 60.0
+PROBE_ID = "startup-probe"
+
+def _module(name: str) -> str:
+    return os.path.splitext(os.path.basename(mcp_transport.SERVERS[name][0]))[0]
+
+def _env() -> dict:
+    # 측정 중에는 trace/metrics 파일을 쓰지 않도록 비활성화
+    return dict(os.environ, MCP_TRANSPORT="stdio", TRACING="0", METRICS="0")
+
+def parse_importtime(stderr: str) -> list:
+    """-X importtime 출력 -> [(모듈, cumulative us, 깊이)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+            entries.append((name.strip(), int(cumulative), depth))
+        except ValueError:
+            continue
+    return entries
+
+def measure_import(name: str) -> dict:
+    """서버 모듈 import 시간 (인터프리터 시작 포함 wall time과 importtime 상위 모듈)"""
+    code = f"import sys; sys.path.insert(0, 'application'); import {_module(name)}"
+    started = time.perf_counter()
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, env=_env(), capture_output=True, text=True, timeout=READY_TIMEOUT,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    entries = parse_importtime(result.stderr)
+    top_level = sorted((e for e in entries if e[2] == 0), key=lambda e: -e[1])
+    return {"wall_ms": wall_ms, "top_level": [(module, us / 1000) for module, us, _ in top_level]}
+
+def measure_ready(name: str) -> float:
+    """서버 실행부터 MCP initialize 응답까지 걸린 시간 (ms)"""
+    started = time.perf_counter()
+    process = subprocess.Popen(  # nosec B603
+        [sys.executable, mcp_transport.SERVERS[name][0]],
+        cwd=ROOT_DIR, env=_env(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True,
+    )
+    answered = threading.Event()
+
+    def read_stdout():
+        for line in process.stdout:
+            try:
+                if json.loads(line).get("id") == PROBE_ID:
+                    answered.set()
+                    return
+            except (json.JSONDecodeError, AttributeError):
+                continue
+
+    reader = threading.Thread(target=read_stdout, daemon=True)
+    reader.start()
+    try:
+        process.stdin.write(json.dumps({
+            "jsonrpc": "2.0", "id": PROBE_ID, "method": "initialize",
+            "params": {"protocolVersion": "2024-11-05", "capabilities": {},
+                       "clientInfo": {"name": "startup_time", "version": "1.0"}},
+        }) + "\n")
+        process.stdin.flush()
+        if not answered.wait(READY_TIMEOUT):
+            raise RuntimeError(f"no initialize response within {READY_TIMEOUT:.0f}s "
+                               f"(exit code {process.poll()})")
+        return (time.perf_counter() - started) * 1000
+    finally:
+        process.kill()
+        process.wait()
+
+def measure(name: str, runs: int) -> dict:
+    imports = [measure_import(name) for _ in range(runs)]
+    ready = [measure_ready(name) for _ in range(runs)]
+    return {
+        "server": name,
+        "import_ms": statistics.median(run["wall_ms"] for run in imports),
+        "ready_ms": statistics.median(ready),
+        "top_level": imports[-1]["top_level"],
+    }
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--servers", default=",".join(mcp_transport.SERVERS),
+                        help="comma separated server names")
+    parser.add_argument("--runs", type=int, default=3, help="measurements per server (median is reported)")
+
+def server_names(args) -> list:
+    names = [name for name in args.servers.split(",") if name]
+    unknown = [name for name in names if name not in mcp_transport.SERVERS]
+    if unknown:
+        sys.exit(f"Unknown servers: {', '.join(unknown)} (choose from {', '.join(mcp_transport.SERVERS)})")
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MCP server cold-start time")
+    add_arguments(parser)
+    parser.add_argument("--top", type=int, default=8, help="heaviest top-level imports to show per server")
+    args = parser.parse_args()
+
+    for name in server_names(args):
+        try:
+            result = measure(name, args.runs)
+        except Exception as e:
+            print(f"{name}: failed - {e}")
+            continue
+        print(f"{name}: import {result['import_ms']:.0f} ms, ready {result['ready_ms']:.0f} ms")
+        for module, ms in result["top_level"][:args.top]:
+            print(f"    {ms:8.1f} ms  {module}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+녹화된 응답(fixtures/*.json)을 그대로 돌려주는 stub MCP 서버
+- 실제 서버와 같은 서버 이름, tool 이름, 인자를 사용하고 녹화된 지연 시간만큼 기다린 뒤 응답
+- STUB_LATENCY_SCALE로 지연 시간을 배율 조정 (0이면 지연 없음)
+
+    python benchmarks/stub_mcp_server.py benchmarks/fixtures/pubmed.json
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "application"))
+
+from mcp.server.fastmcp import FastMCP  # noqa: E402
+
+import tracing  # noqa: E402
+
+LATENCY_SCALE = float(os.getenv("STUB_LATENCY_SCALE", "1.0"))
+PARAM_TYPES = {"string": str, "integer": int, "number": float, "boolean": bool}
+
+def _make_handler(spec: dict):
+    """fixture 항목과 같은 이름/인자를 가진 tool handler 생성"""
+    async def handler(**kwargs):
+        await asyncio.sleep(spec.get("latency", 0.0) * LATENCY_SCALE)
+        return spec["response"]
+
+    parameters = []
+    for index, (name, kind) in enumerate(spec.get("params", {}).items()):
+        # 첫 번째 인자만 필수로 두고 나머지는 실제 tool처럼 기본값 사용
+        default = inspect.Parameter.empty if index == 0 else (3 if kind in ("integer", "number") else "")
+        parameters.append(inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY,
+                                            default=default, annotation=PARAM_TYPES.get(kind, str)))
+    handler.__signature__ = inspect.Signature(parameters, return_annotation=str)
+    handler.__name__ = spec["name"]
+    handler.__doc__ = spec.get("description", "")
+    return handler
+
+def main():
+    with open(sys.argv[1], encoding="utf-8") as f:
+        fixture = json.load(f)
+
+    mcp = FastMCP(name=fixture["server"])
+    tracing.instrument_mcp(mcp)
+    for spec in fixture["tools"]:
+        mcp.tool()(_make_handler(spec))
+    mcp.run(transport="stdio")
+
+if __name__ == "__main__":
+    main()
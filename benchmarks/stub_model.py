@@ -0,0 +1,141 @@
+"""
+Bedrock 대신 사용하는 결정적(deterministic) stub 모델
+- 새 질문을 받으면 STUB_TOOL_PLAN에 적힌 tool을 순서대로 하나씩 호출하고, 모두 호출한 뒤 답변 생성
+- 첫 토큰 지연과 초당 토큰 수를 설정하여 실제 모델의 스트리밍 속도를 흉내냄
+- 입력/출력 토큰 수를 metadata 이벤트로 보고 (글자 수 / 4 기준)
+"""
+
+import asyncio
+import enum
+import json
+import os
+import typing
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from pydantic import BaseModel
+from strands.models import Model
+
+DEFAULT_TOOL_PLAN = "pubmed_search,search_papers,target_activity,get_studies_by_keyword"
+ANSWER_WORDS = (
+    "HER2 표적 치료 연구는 항체-약물 접합체와 저분자 억제제 중심으로 빠르게 발전하고 있습니다. "
+    "최근 임상 결과는 HER2-low 환자군에서도 유의미한 무진행 생존 개선을 보여줍니다. "
+    "ChEMBL 활성 데이터에서는 nM 수준의 IC50을 가진 화합물이 다수 확인됩니다. "
+).split()
+
+def _stub_value(annotation: Any) -> Any:
+    """타입 힌트에 맞는 결정적인 값 (문자열 "stub", 숫자 0, 빈 컬렉션, 중첩 모델은 재귀)"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        # Optional[X] 등은 None이 아닌 첫 번째 타입 사용
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _stub_value(args[0]) if args else None
+    if origin is typing.Literal:
+        return typing.get_args(annotation)[0]
+    if origin in (list, tuple, set, frozenset):
+        return origin()
+    if origin is dict:
+        return {}
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return _stub_instance(annotation)
+        if issubclass(annotation, enum.Enum):
+            return next(iter(annotation))
+        if issubclass(annotation, bool):
+            return False
+        if issubclass(annotation, (int, float)):
+            return annotation(0)
+    return "stub"
+
+def _stub_instance(output_model):
+    values = {}
+    for name, field in output_model.model_fields.items():
+        if not field.is_required():
+            continue
+        values[name] = _stub_value(field.annotation)
+    return output_model(**values)
+
+class StubModel(Model):
+    """tool 호출과 토큰 스트리밍을 설정된 속도로 재현하는 모델"""
+
+    def __init__(self, first_token_latency: Optional[float] = None, tokens_per_second: Optional[float] = None,
+                 answer_tokens: Optional[int] = None, tool_plan: Optional[List[str]] = None, **config):
+        self.first_token_latency = first_token_latency if first_token_latency is not None else float(
+            os.getenv("STUB_FIRST_TOKEN_LATENCY", "0.5"))
+        self.tokens_per_second = tokens_per_second or float(os.getenv("STUB_TOKENS_PER_SECOND", "60"))
+        self.answer_tokens = answer_tokens or int(os.getenv("STUB_ANSWER_TOKENS", "300"))
+        self.tool_plan = tool_plan if tool_plan is not None else [
+            name for name in os.getenv("STUB_TOOL_PLAN", DEFAULT_TOOL_PLAN).split(",") if name
+        ]
+        self.config = dict(config, model_id="stub")
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """output_model의 모든 필드를 타입별 고정값으로 채운 인스턴스 반환 (첫 토큰 지연만큼 대기)"""
+        await asyncio.sleep(self.first_token_latency)
+        yield {"output": _stub_instance(output_model)}
+
+    @staticmethod
+    def _turn(messages: List[Dict[str, Any]]):
+        """마지막 사용자 질문과 그 이후 호출된 tool 이름 목록"""
+        question, called = "", []
+        for message in messages:
+            for block in message.get("content", []):
+                if message["role"] == "user" and "text" in block:
+                    question, called = block["text"], []
+                elif "toolUse" in block:
+                    called.append(block["toolUse"]["name"])
+        return question, called
+
+    @staticmethod
+    def _tool_input(spec: Dict[str, Any], question: str) -> Dict[str, Any]:
+        """tool schema의 필수 인자를 질문으로 채움 (문자열은 질문, 숫자는 3)"""
+        schema = spec.get("inputSchema", {}).get("json", {})
+        arguments = {}
+        for name in schema.get("required", []):
+            kind = schema.get("properties", {}).get(name, {}).get("type", "string")
+            arguments[name] = 3 if kind in ("integer", "number") else question
+        return arguments
+
+    def _next_tool(self, tool_specs, called: List[str]) -> Optional[Dict[str, Any]]:
+        available = {spec["name"]: spec for spec in tool_specs or []}
+        for name in self.tool_plan:
+            if name in available and name not in called:
+                return available[name]
+        return None
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs) -> AsyncGenerator[dict, None]:
+        question, called = self._turn(messages)
+        input_tokens = len(json.dumps(messages, ensure_ascii=False, default=str)) // 4 + len(system_prompt or "") // 4
+
+        await asyncio.sleep(self.first_token_latency)
+        yield {"messageStart": {"role": "assistant"}}
+
+        spec = self._next_tool(tool_specs, called)
+        if spec is not None:
+            tool_use_id = f"tooluse_{len(called)}_{spec['name']}"
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": tool_use_id, "name": spec["name"]}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {
+                "input": json.dumps(self._tool_input(spec, question), ensure_ascii=False)}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output_tokens = 20
+        else:
+            yield {"contentBlockStart": {"start": {}}}
+            delay = 1.0 / self.tokens_per_second
+            for index in range(self.answer_tokens):
+                yield {"contentBlockDelta": {"delta": {"text": ANSWER_WORDS[index % len(ANSWER_WORDS)] + " "}}}
+                await asyncio.sleep(delay)
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            output_tokens = self.answer_tokens
+
+        yield {"metadata": {
+            "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens,
+                      "totalTokens": input_tokens + output_tokens},
+            "metrics": {"latencyMs": int(self.first_token_latency * 1000)},
+        }}